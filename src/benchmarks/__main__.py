@@ -0,0 +1,95 @@
+"""Run the benchmark suite, and compare its results to a baseline
+
+Run from the src folder with:
+    python -m benchmarks run [-o results.json] [-k filter]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.1]
+
+compare exits with 1 if any case regressed, so it can fail a CI job.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from beartype.typing import List, Optional
+
+from .runner import THRESHOLD, compare, format_comparisons, load, run, save
+from .suite import get_cases
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[1:]),
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Time the cases of the suite")
+    run_parser.add_argument(
+        "-o", "--output", help="The file to save the results to as JSON"
+    )
+    run_parser.add_argument(
+        "-k",
+        "--filter",
+        action="append",
+        default=[],
+        help="Only run the cases whose group/name contains this, can be repeated",
+    )
+    run_parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="The minimum time in seconds of one timed loop",
+    )
+    run_parser.add_argument(
+        "--repeat", type=int, default=5, help="The amount of timed loops per case"
+    )
+    run_parser.add_argument(
+        "--compare", help="A baseline to compare the results to when done"
+    )
+    run_parser.add_argument("--threshold", type=float, default=THRESHOLD)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Compare results to a baseline"
+    )
+    compare_parser.add_argument("baseline", help="The results to compare to")
+    compare_parser.add_argument("current", help="The results to compare")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="The fraction a case can be slower before it is a regression",
+    )
+
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == "run":
+        cases = [
+            case
+            for case in get_cases()
+            if not arguments.filter
+            or any(part in f"{case.group}/{case.name}" for part in arguments.filter)
+        ]
+        current = run(cases, arguments.min_time, arguments.repeat)
+        if arguments.output is not None:
+            save(current, arguments.output)
+        if arguments.compare is None:
+            return 0
+        baseline = load(arguments.compare)
+    else:
+        baseline, current = load(arguments.baseline), load(arguments.current)
+
+    comparisons = compare(baseline, current, arguments.threshold)
+    print("\n".join(format_comparisons(comparisons)))
+    regressions = [comparison for comparison in comparisons if comparison.regression]
+    if regressions:
+        print(f"{len(regressions)} of {len(comparisons)} cases regressed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
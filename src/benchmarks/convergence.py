@@ -0,0 +1,416 @@
+"""Measure how fast a GA configuration solves the rows of ca_input.csv
+
+Run from the src folder with:
+    python -m benchmarks.convergence run -o a.jsonl [--config main:new_genetic_algorithm]
+    python -m benchmarks.convergence compare a.jsonl b.jsonl
+
+A configuration is a function that takes an AutomataObjectiveFunction and returns a
+GeneticAlgorithm, like new_genetic_algorithm in main.py, given as module:function.
+Every row is run for a number of seeded repetitions, in parallel, and every run is
+written as a line of JSON. A run that stops before the budget is used up found C0.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import sys
+import time
+import warnings
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+from nptyping import NDArray
+from beartype import beartype
+from beartype.typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from tests.helpers import get_input
+from tests.parallel import get_seeds, new_seeded_run
+
+INPUTFILE = str(Path(__file__).resolve().parents[2] / "input" / "ca_input.csv")
+BOOTSTRAP_SAMPLES = 2000
+CONFIDENCE = 0.95
+
+
+class Run(NamedTuple):
+    """One repetition of a configuration on one row of the input"""
+
+    name: str
+    row: int
+    repetition: int
+    seed: int
+    budget: int
+    evaluations: int
+    solved: bool
+    best: float
+    seconds: float
+
+
+class RunJob(NamedTuple):
+    """What a worker needs to do one run. The factories are passed by name,
+    so they are imported in the worker instead of being pickled."""
+
+    name: str
+    config: str
+    objective: str
+    inputfile: str
+    row: int
+    repetition: int
+    seed: int
+    budget: int
+
+
+@beartype
+def load_function(path: str) -> Callable:
+    """Import a function given as module:function"""
+    module, _, function = path.partition(":")
+    return getattr(importlib.import_module(module), function)
+
+
+@beartype
+def run_job(job: RunJob) -> Run:
+    """Run the configuration once on a row, with its own seed"""
+    objective_function = load_function(job.objective)(get_input(job.inputfile)[job.row])
+    genetic_algorithm = load_function(job.config)(objective_function)
+    problem = new_seeded_run(
+        genetic_algorithm, objective_function, f"Row{job.row}", job.seed
+    )
+    # Build the composed rule tables before the clock starts, outside of the budget
+    objective_function.ca(np.zeros_like(objective_function.ct), objective_function.t)
+
+    start = time.perf_counter()
+    genetic_algorithm(problem, job.budget)
+    seconds = time.perf_counter() - start
+
+    best = problem.state.current_best
+    return Run(
+        name=job.name,
+        row=job.row,
+        repetition=job.repetition,
+        seed=job.seed,
+        budget=job.budget,
+        evaluations=int(problem.state.evaluations),
+        solved=bool(objective_function.is_optimal(np.asarray(best.x))),
+        best=float(best.y),
+        seconds=seconds,
+    )
+
+
+@beartype
+def run_configuration(
+    name: str,
+    config: str,
+    objective: str,
+    budget: int,
+    repetitions: int,
+    rows: Optional[List[int]] = None,
+    inputfile: str = INPUTFILE,
+    processes: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[Run]:
+    """Run a configuration for some repetitions on every row, in parallel
+
+    ---
+    Parameters:
+    name: str
+        The name to record the runs under
+    config: str
+        The module:function that makes the GeneticAlgorithm from an objective function
+    objective: str
+        The module:function that makes the objective function from a row of the input
+    budget: int
+        The amount of evaluations of each run
+    repetitions: int
+        The amount of runs on every row
+    rows: Optional[List[int]]
+        The rows to run on, all of them if None
+    inputfile: str
+        The csv file with the rows
+    processes: Optional[int]
+        The amount of worker processes, the amount of cores if None
+    seed: Optional[int]
+        The seed to derive the seed of every run from
+
+    ---
+    Returns:
+    List[Run], ordered by row and repetition
+    """
+    if rows is None:
+        rows = list(range(len(get_input(inputfile))))
+    keys = [(row, repetition) for row in rows for repetition in range(repetitions)]
+    jobs = [
+        RunJob(name, config, objective, inputfile, row, repetition, job_seed, budget)
+        for (row, repetition), job_seed in zip(keys, get_seeds(len(keys), seed))
+    ]
+    with Pool(processes) as pool:
+        return pool.map(run_job, jobs, chunksize=1)
+
+
+@beartype
+def save_runs(runs: List[Run], path: str) -> None:
+    with open(path, "w") as f:
+        for run in runs:
+            f.write(json.dumps(run._asdict()) + "\n")
+
+
+@beartype
+def load_runs(path: str) -> List[Run]:
+    with open(path) as f:
+        return [Run(**json.loads(line)) for line in f if line.strip()]
+
+
+@beartype
+def get_ert(evaluations: NDArray, solved: NDArray) -> float:
+    """Gets the expected running time: the evaluations of all runs per solved run.
+    Unsolved runs count with all the evaluations they used. inf if none were solved.
+    """
+    successes = np.count_nonzero(solved)
+    return float(evaluations.sum() / successes) if successes else float("inf")
+
+
+@beartype
+def get_statistics(runs: List[Run]) -> Dict[str, float]:
+    """Gets the success rate, the expected running time in evaluations, the mean
+    evaluations of the solved runs and the mean wall time of a set of runs"""
+    evaluations = np.array([run.evaluations for run in runs])
+    solved = np.array([run.solved for run in runs])
+    seconds = np.array([run.seconds for run in runs])
+    return {
+        "runs": float(len(runs)),
+        "success_rate": float(solved.mean()),
+        "ert": get_ert(evaluations, solved),
+        "evaluations_solved": (
+            float(evaluations[solved].mean()) if solved.any() else float("nan")
+        ),
+        "seconds": float(seconds.mean()),
+    }
+
+
+@beartype
+def bootstrap(
+    statistic: Callable[..., float],
+    sizes: Tuple[int, ...],
+    samples: int = BOOTSTRAP_SAMPLES,
+    confidence: float = CONFIDENCE,
+    rng: Optional[np.random.Generator] = None,
+) -> Tuple[float, float]:
+    """Gets a percentile bootstrap confidence interval of a statistic of sets of runs
+    Every set is resampled on its own.
+
+    ---
+    Parameters:
+    statistic: Callable[..., float]
+        Gets the statistic from the indices of a resample of every set
+    sizes: Tuple[int, ...]
+        The amount of runs in every set
+    samples: int
+        The amount of resamples
+    confidence: float
+        The confidence level of the interval
+    rng: Optional[np.random.Generator]
+        The generator to resample with, a seeded one if None, so intervals are repeatable
+
+    ---
+    Returns:
+    The lower and upper bound. Resamples where the statistic is nan are ignored.
+    """
+    rng = np.random.default_rng(0) if rng is None else rng
+    values = np.array(
+        [
+            statistic(*(rng.integers(size, size=size) for size in sizes))
+            for _ in range(samples)
+        ],
+        dtype=np.float64,
+    )
+    tail = (1 - confidence) / 2 * 100
+    with warnings.catch_warnings():
+        # All resamples are nan if, for example, a set never solved a row
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lower, upper = np.nanpercentile(values, [tail, 100 - tail])
+    return float(lower), float(upper)
+
+
+@beartype
+def compare_runs(
+    baseline: List[Run],
+    current: List[Run],
+    samples: int = BOOTSTRAP_SAMPLES,
+    confidence: float = CONFIDENCE,
+) -> Dict[str, Dict[str, Any]]:
+    """Compare two sets of runs on the same rows, with confidence intervals of the
+    difference in success rate, and of the ratio of expected running time and wall time.
+    The runs of both sets are resampled on their own.
+
+    ---
+    Returns:
+    Dict[str, Dict[str, Any]]
+        The comparison of every row both sets ran on, by row, and of all rows as "all"
+    """
+    groups = {}
+    for row in sorted({run.row for run in baseline} & {run.row for run in current}):
+        groups[str(row)] = (
+            [run for run in baseline if run.row == row],
+            [run for run in current if run.row == row],
+        )
+    groups["all"] = (baseline, current)
+
+    comparisons = {}
+    for group, (old, new) in groups.items():
+        arrays = [
+            (
+                np.array([run.evaluations for run in runs]),
+                np.array([run.solved for run in runs]),
+                np.array([run.seconds for run in runs]),
+            )
+            for runs in (old, new)
+        ]
+        (old_evals, old_solved, old_seconds), (new_evals, new_solved, new_seconds) = (
+            arrays
+        )
+
+        def ert_ratio(old_sample: NDArray, new_sample: NDArray) -> float:
+            before = get_ert(old_evals[old_sample], old_solved[old_sample])
+            after = get_ert(new_evals[new_sample], new_solved[new_sample])
+            if np.isinf(before) or np.isinf(after):
+                return float("nan")
+            return after / before
+
+        sizes = (len(old), len(new))
+        comparisons[group] = {
+            "baseline": get_statistics(old),
+            "current": get_statistics(new),
+            "success_rate_difference": bootstrap(
+                lambda o, n: new_solved[n].mean() - old_solved[o].mean(),
+                sizes,
+                samples,
+                confidence,
+            ),
+            "ert_ratio": bootstrap(ert_ratio, sizes, samples, confidence),
+            "seconds_ratio": bootstrap(
+                lambda o, n: new_seconds[n].mean() / old_seconds[o].mean(),
+                sizes,
+                samples,
+                confidence,
+            ),
+        }
+    return comparisons
+
+
+@beartype
+def format_statistics(runs: List[Run]) -> List[str]:
+    """Format the statistics of every row, and of all rows, as a table"""
+    lines = [f"{'row':>5}{'runs':>6}{'success':>9}{'ERT':>12}{'evals':>12}{'s':>9}"]
+    rows = sorted({run.row for run in runs})
+    groups = [(str(row), [run for run in runs if run.row == row]) for row in rows]
+    for group, selected in groups + [("all", runs)]:
+        statistics = get_statistics(selected)
+        lines.append(
+            f"{group:>5}{int(statistics['runs']):>6}{statistics['success_rate']:>9.2f}"
+            f"{statistics['ert']:>12.1f}{statistics['evaluations_solved']:>12.1f}"
+            f"{statistics['seconds']:>9.3f}"
+        )
+    return lines
+
+
+@beartype
+def format_comparisons(
+    comparisons: Dict[str, Dict[str, Any]], confidence: float = CONFIDENCE
+) -> List[str]:
+    """Format the comparisons as a table. An interval that does not contain
+    no change is marked with a *, as the difference is significant."""
+
+    def interval(bounds: Tuple[float, float], no_change: float) -> str:
+        lower, upper = bounds
+        marker = "*" if lower > no_change or upper < no_change else " "
+        return f"[{lower:7.2f}, {upper:7.2f}]{marker}"
+
+    level = f"{confidence:.0%}"
+    lines = [
+        f"{'row':>5}{'success a':>10}{'success b':>10}{'difference (' + level + ')':>22}"
+        f"{'ERT a':>10}{'ERT b':>10}{'ratio (' + level + ')':>22}"
+        f"{'time ratio (' + level + ')':>24}"
+    ]
+    for group, comparison in comparisons.items():
+        old, new = comparison["baseline"], comparison["current"]
+        lines.append(
+            f"{group:>5}{old['success_rate']:>10.2f}{new['success_rate']:>10.2f}"
+            f"{interval(comparison['success_rate_difference'], 0.0):>22}"
+            f"{old['ert']:>10.1f}{new['ert']:>10.1f}"
+            f"{interval(comparison['ert_ratio'], 1.0):>22}"
+            f"{interval(comparison['seconds_ratio'], 1.0):>24}"
+        )
+    return lines
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.convergence",
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[1:]),
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run a configuration on every row")
+    run_parser.add_argument("-o", "--output", help="The file to write the runs to")
+    run_parser.add_argument("--name", default="GeneticAlgorithm")
+    run_parser.add_argument(
+        "--config",
+        default="main:new_genetic_algorithm",
+        help="The module:function that makes the GeneticAlgorithm",
+    )
+    run_parser.add_argument(
+        "--objective",
+        default="main:new_objective_function",
+        help="The module:function that makes the objective function of a row",
+    )
+    run_parser.add_argument("--budget", type=int, default=10000)
+    run_parser.add_argument("--repetitions", type=int, default=10)
+    run_parser.add_argument(
+        "--rows", type=int, nargs="+", help="The rows to run on, all if not set"
+    )
+    run_parser.add_argument("--input", default=INPUTFILE)
+    run_parser.add_argument(
+        "--processes", type=int, help="The amount of worker processes"
+    )
+    run_parser.add_argument("--seed", type=int, default=0)
+
+    compare_parser = commands.add_parser("compare", help="Compare two sets of runs")
+    compare_parser.add_argument("baseline", help="The runs of configuration a")
+    compare_parser.add_argument("current", help="The runs of configuration b")
+    compare_parser.add_argument("--samples", type=int, default=BOOTSTRAP_SAMPLES)
+    compare_parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == "run":
+        runs = run_configuration(
+            name=arguments.name,
+            config=arguments.config,
+            objective=arguments.objective,
+            budget=arguments.budget,
+            repetitions=arguments.repetitions,
+            rows=arguments.rows,
+            inputfile=arguments.input,
+            processes=arguments.processes,
+            seed=arguments.seed,
+        )
+        if arguments.output is not None:
+            save_runs(runs, arguments.output)
+        print("\n".join(format_statistics(runs)))
+        return 0
+
+    comparisons = compare_runs(
+        load_runs(arguments.baseline),
+        load_runs(arguments.current),
+        arguments.samples,
+        arguments.confidence,
+    )
+    print("\n".join(format_comparisons(comparisons, arguments.confidence)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
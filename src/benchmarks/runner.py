@@ -0,0 +1,178 @@
+"""Run the cases of the suite, and save and compare their results as baselines"""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+import numpy as np
+from beartype import beartype
+from beartype.typing import Any, Dict, List, NamedTuple, Optional
+
+from cellular_automata.helpers import POLICY
+from .suite import Case
+
+# A slowdown beyond this fraction of the baseline is flagged as a regression
+THRESHOLD = 0.1
+
+
+class Comparison(NamedTuple):
+    """The results of one case in a baseline and in a new run"""
+
+    name: str
+    baseline: Optional[float]
+    current: Optional[float]
+    ratio: Optional[float]
+    regression: bool
+
+
+@beartype
+def time_case(case: Case, min_time: float = 0.2, repeat: int = 5) -> Dict[str, Any]:
+    """Time a case: the statement is run in loops of at least min_time seconds
+
+    ---
+    Parameters:
+    case: Case
+        The case to time
+    min_time: float
+        The minimum time in seconds of one loop
+    repeat: int
+        The amount of loops to time
+
+    ---
+    Returns:
+    Dict[str, Any]
+        The best and median time per call in seconds, and the calls per loop
+    """
+    statement = case.setup()
+    timer = timeit.Timer(statement)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    times = [loop / number for loop in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+@beartype
+def get_metadata() -> Dict[str, str]:
+    """Gets what the timings depend on, other than the code"""
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "typecheck": POLICY,
+    }
+
+
+@beartype
+def run(
+    cases: List[Case], min_time: float = 0.2, repeat: int = 5, verbose: bool = True
+) -> Dict[str, Any]:
+    """Run the cases, returning a baseline of their results
+
+    ---
+    Parameters:
+    cases: List[Case]
+        The cases to time
+    min_time: float
+        The minimum time in seconds of one loop
+    repeat: int
+        The amount of loops to time
+    verbose: bool
+        Whether to print every result as it is timed
+
+    ---
+    Returns:
+    Dict[str, Any]
+        The metadata of the run, and the results by the group and name of the case
+    """
+    results = {}
+    for case in cases:
+        name = f"{case.group}/{case.name}"
+        results[name] = time_case(case, min_time, repeat)
+        if verbose:
+            print(f"{name:<60}{results[name]['best'] * 1e6:>14.2f} us", flush=True)
+    return {"metadata": get_metadata(), "results": results}
+
+
+@beartype
+def save(baseline: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+@beartype
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+@beartype
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = THRESHOLD
+) -> List[Comparison]:
+    """Compare the best times of two runs, case by case
+
+    ---
+    Parameters:
+    baseline: Dict[str, Any]
+        The run to compare to
+    current: Dict[str, Any]
+        The run to compare
+    threshold: float
+        The fraction the current run can be slower, before it is a regression
+
+    ---
+    Returns:
+    List[Comparison], for every case in either run. Cases that are only in one of
+    the runs have no ratio, and are not regressions.
+    """
+    old, new = baseline["results"], current["results"]
+    comparisons = []
+    for name in list(old) + [name for name in new if name not in old]:
+        before = old[name]["best"] if name in old else None
+        after = new[name]["best"] if name in new else None
+        ratio = None if before is None or after is None else after / before
+        comparisons.append(
+            Comparison(
+                name=name,
+                baseline=before,
+                current=after,
+                ratio=ratio,
+                regression=ratio is not None and ratio > 1 + threshold,
+            )
+        )
+    return comparisons
+
+
+@beartype
+def format_comparisons(comparisons: List[Comparison]) -> List[str]:
+    """Format the comparisons as a table, with the regressions marked"""
+
+    def microseconds(seconds: Optional[float]) -> str:
+        return "-" if seconds is None else f"{seconds * 1e6:.2f}"
+
+    lines = [f"{'case':<60}{'baseline (us)':>15}{'current (us)':>15}{'ratio':>8}"]
+    for comparison in comparisons:
+        ratio = "-" if comparison.ratio is None else f"{comparison.ratio:.2f}"
+        lines.append(
+            f"{comparison.name:<60}{microseconds(comparison.baseline):>15}"
+            f"{microseconds(comparison.current):>15}{ratio:>8}"
+            + ("  REGRESSION" if comparison.regression else "")
+        )
+    return lines
@@ -0,0 +1,309 @@
+"""The cases of the benchmark suite
+
+Every case has a setup function that returns the statement to time,
+so the setup of cases that are not run is skipped.
+"""
+
+from __future__ import annotations
+
+import atexit
+from functools import partial
+import random
+import shutil
+import tempfile
+
+import numpy as np
+from nptyping import NDArray
+from beartype import beartype
+from beartype.typing import Callable, List, NamedTuple, Optional
+
+from cellular_automata import (
+    AutomataObjectiveFunction,
+    CellularAutomata,
+    RuleSet,
+    HammingSimilarity,
+    LeeSimilarity,
+    DamerauLevenshteinSimilarity,
+    LCSSimilarity,
+    GestaltSimilarity,
+    CompositeSimilarity,
+)
+from cellular_automata.helpers import damerau_levenshtein, damerau_levenshtein_imported
+from genetic_algorithm.algorithms import (
+    UniformCrossover,
+    PointCrossover,
+    Swap,
+    BitflipMutation,
+    InsertionMutation,
+    SwapMutation,
+    CombinedMutation,
+    TournamentSelection,
+    RouletteSelection,
+    DeterministicSelection,
+)
+from genetic_algorithm.helpers import ParallelEvaluator
+
+SEED = 0
+WIDTHS = (16, 256, 4096)
+KS = (2, 3)
+RS = (1, 2)
+STEPS = (1, 10, 100)
+SIMILARITY_WIDTHS = (64, 256)
+POPULATION_SIZES = (20, 100, 500)
+DIMENSIONS = 100
+ALLIGNMENT_LENGTHS = (16, 64, 256)
+# A generation of main.py's GA, on wide stages over many steps
+EVALUATION_POPULATION = 170
+EVALUATION_SIZES = ((1024, 100), (4096, 100))
+EVALUATION_PROCESSES = (1, 2, 4)
+
+# Composed rule tables of the cellular automata are written here, not to the repo
+CACHE_DIR = tempfile.mkdtemp(prefix="benchmark_rule_tables_")
+atexit.register(shutil.rmtree, CACHE_DIR, ignore_errors=True)
+
+
+class Case(NamedTuple):
+    """One benchmark: its name, the group it is in, and its setup function"""
+
+    name: str
+    group: str
+    setup: Callable[[], Callable[[], object]]
+
+
+@beartype
+def get_rule(k: int, r: int) -> int:
+    """Gets a random, but fixed, rule for the given k and r"""
+    return random.Random(SEED).randrange(k ** (k ** (2 * r + 1)))
+
+
+@beartype
+def get_stage(width: int, k: int = 2) -> NDArray:
+    return np.random.default_rng(SEED).integers(k, size=width, dtype=np.int8)
+
+
+@beartype
+def get_population(pop_size: int, dimensions: int = DIMENSIONS) -> NDArray:
+    return np.random.default_rng(SEED).integers(
+        2, size=(pop_size, dimensions), dtype=np.int8
+    )
+
+
+@beartype
+def get_automata_cases() -> List[Case]:
+    cases = []
+    for width in WIDTHS:
+        for k in KS:
+            for r in RS:
+                cases.append(
+                    Case(
+                        f"ruleset[w={width},k={k},r={r}]",
+                        "automata",
+                        partial(_ruleset, width, k, r),
+                    )
+                )
+                for t in STEPS:
+                    cases.append(
+                        Case(
+                            f"automata[w={width},k={k},r={r},t={t}]",
+                            "automata",
+                            partial(_automata, width, k, r, t),
+                        )
+                    )
+    return cases
+
+
+def _ruleset(width: int, k: int, r: int) -> Callable[[], object]:
+    rule_set = RuleSet(get_rule(k, r), k, r)
+    stage = get_stage(width, k)
+    return lambda: rule_set(stage)
+
+
+def _automata(width: int, k: int, r: int, t: int) -> Callable[[], object]:
+    ca = CellularAutomata(get_rule(k, r), k, r, cache_dir=CACHE_DIR)
+    stage = get_stage(width, k)
+    # Build the composed tables before timing
+    ca(stage.copy(), t)
+    return lambda: ca(stage.copy(), t)
+
+
+@beartype
+def get_similarity_cases() -> List[Case]:
+    methods = {
+        "hamming": HammingSimilarity,
+        "lee": LeeSimilarity,
+        "damerau_levenshtein": DamerauLevenshteinSimilarity,
+        "lcs": LCSSimilarity,
+        "gestalt": GestaltSimilarity,
+        "composite": lambda: CompositeSimilarity(HammingSimilarity(), LeeSimilarity()),
+    }
+    cases = []
+    for name, method in methods.items():
+        for width in SIMILARITY_WIDTHS:
+            cases.append(
+                Case(
+                    f"{name}[w={width}]",
+                    "similarity",
+                    partial(_similarity, method, width),
+                )
+            )
+            cases.append(
+                Case(
+                    f"{name}.batch[w={width},n=100]",
+                    "similarity",
+                    partial(_similarity_batch, method, width),
+                )
+            )
+    return cases
+
+
+def _similarity(method: Callable, width: int) -> Callable[[], object]:
+    similarity = method()
+    ct, ct_prime = get_population(2, width)
+    return lambda: similarity(ct, ct_prime)
+
+
+def _similarity_batch(method: Callable, width: int) -> Callable[[], object]:
+    similarity = method()
+    ct = get_stage(width)
+    ct_primes = get_population(100, width)
+    return lambda: similarity.batch(ct, ct_primes)
+
+
+@beartype
+def get_operator_cases() -> List[Case]:
+    operators = {
+        "crossover": {
+            "uniform": lambda rng: UniformCrossover(rng=rng),
+            "uniform_random": lambda rng: UniformCrossover(
+                swap_function=Swap.random, rng=rng
+            ),
+            "point": lambda rng: PointCrossover(rng=rng),
+            "point_random": lambda rng: PointCrossover(
+                amount_of_splits=3, swap_function=Swap.random, rng=rng
+            ),
+        },
+        "mutation": {
+            "bitflip": lambda rng: BitflipMutation(1.0, rng=rng),
+            "insertion": lambda rng: InsertionMutation(multiple_values=True, rng=rng),
+            "swap": lambda rng: SwapMutation(rng=rng),
+            "combined": lambda rng: CombinedMutation(
+                BitflipMutation(1.0), SwapMutation(), rng=rng
+            ),
+        },
+        "selection": {
+            "tournament": lambda rng: TournamentSelection(rng=rng),
+            "tournament_remove": lambda rng: TournamentSelection(
+                remove_chosen=True, rng=rng
+            ),
+            "roulette": lambda rng: RouletteSelection(rng=rng),
+            "roulette_remove": lambda rng: RouletteSelection(
+                remove_chosen=True, rng=rng
+            ),
+            "deterministic": lambda rng: DeterministicSelection(),
+        },
+    }
+    cases = []
+    for group, algorithms in operators.items():
+        for name, algorithm in algorithms.items():
+            for pop_size in POPULATION_SIZES:
+                cases.append(
+                    Case(
+                        f"{name}[n={pop_size}]",
+                        group,
+                        partial(_operator, group, algorithm, pop_size),
+                    )
+                )
+    return cases
+
+
+def _operator(group: str, algorithm: Callable, pop_size: int) -> Callable[[], object]:
+    rng = np.random.default_rng(SEED)
+    operator = algorithm(rng)
+    population = get_population(pop_size)
+    if group == "crossover":
+        out = np.empty(
+            (operator.get_amount_of_children(pop_size), DIMENSIONS), dtype=np.int8
+        )
+        return lambda: operator(population, out=out)
+    if group == "mutation":
+        out = np.empty_like(population)
+        return lambda: operator(population, out=out)
+    scores = rng.random(pop_size)
+    out = np.empty((pop_size // 2, DIMENSIONS), dtype=np.int8)
+    return lambda: operator(population, scores, pop_size // 2, out=out)
+
+
+@beartype
+def get_allignment_cases() -> List[Case]:
+    functions = {
+        "damerau_levenshtein": damerau_levenshtein,
+        "damerau_levenshtein_imported": damerau_levenshtein_imported,
+    }
+    cases = []
+    for name, function in functions.items():
+        for length in ALLIGNMENT_LENGTHS:
+            cases.append(
+                Case(
+                    f"{name}[l={length}]",
+                    "allignment",
+                    partial(_allignment, function, length),
+                )
+            )
+    return cases
+
+
+def _allignment(function: Callable, length: int) -> Callable[[], object]:
+    x, y = get_population(2, length)
+    return lambda: function(x, y)
+
+
+@beartype
+def get_evaluation_cases() -> List[Case]:
+    """The batch function of a generation, against a ParallelEvaluator with
+    increasing amounts of worker processes, to measure how the evaluator scales"""
+    cases = []
+    for width, t in EVALUATION_SIZES:
+        cases.append(
+            Case(
+                f"batch[w={width},t={t}]",
+                "evaluation",
+                partial(_evaluation, width, t, None),
+            )
+        )
+        for processes in EVALUATION_PROCESSES:
+            cases.append(
+                Case(
+                    f"parallel[w={width},t={t},p={processes}]",
+                    "evaluation",
+                    partial(_evaluation, width, t, processes),
+                )
+            )
+    return cases
+
+
+def _evaluation(width: int, t: int, processes: Optional[int]) -> Callable[[], object]:
+    ca = CellularAutomata(get_rule(2, 1), cache_dir=CACHE_DIR)
+    objective_function = AutomataObjectiveFunction(
+        ca, HammingSimilarity(), get_stage(width), t
+    )
+    population = get_population(EVALUATION_POPULATION, width)
+    if processes is None:
+        evaluate = objective_function.get_batch_function()
+    else:
+        evaluate = ParallelEvaluator(objective_function, processes)
+        atexit.register(evaluate.close)
+    # Build the composed tables, and start the workers, before timing
+    evaluate(population)
+    return lambda: evaluate(population)
+
+
+@beartype
+def get_cases() -> List[Case]:
+    """Gets every case of the suite"""
+    return (
+        get_automata_cases()
+        + get_similarity_cases()
+        + get_operator_cases()
+        + get_allignment_cases()
+        + get_evaluation_cases()
+    )
@@ -0,0 +1,173 @@
+"""Measure the overhead of type checking the hot functions
+
+Run from the src folder with:
+    python -m benchmarks.typechecking
+
+Every workload is timed in a new process for each type checking policy,
+as the policy is read when the packages are imported.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+import numpy as np
+from beartype import beartype
+from beartype.typing import Callable, Dict, List, Tuple
+
+from cellular_automata.helpers import POLICY_VARIABLE
+
+# The number of timed calls, and the number of repeats to take the best of
+NUMBER = 200
+REPEAT = 5
+
+
+@beartype
+def get_workloads() -> Dict[str, Tuple[Callable, int]]:
+    """Get the workloads to time, imported under the policy of this process
+
+    ---
+    Returns:
+    Dict[str, Tuple[Callable, int]]
+        The workloads by name, with the amount of hot calls each one makes
+    """
+    from cellular_automata import (
+        AutomataObjectiveFunction,
+        CellularAutomata,
+        HammingSimilarity,
+        RuleSet,
+    )
+    from cellular_automata.stage_renderer import StageRenderer
+    from genetic_algorithm.algorithms import (
+        BitflipMutation,
+        PointCrossover,
+        TournamentSelection,
+    )
+
+    rng = np.random.default_rng(0)
+    rule_set = RuleSet(30)
+    stage = rng.integers(2, size=16, dtype=np.int8)
+    padded = rule_set.pad(stage, rule_set.r)
+    similarity = HammingSimilarity()
+    ct = rng.integers(2, size=16, dtype=np.int8)
+    items = [np.int8(x) for x in rng.integers(5, size=64)]
+
+    population = rng.integers(2, size=(100, 60), dtype=np.int8)
+    scores = rng.random(100)
+    crossover = PointCrossover(rng=rng)
+    mutation = BitflipMutation(1.0, rng=rng)
+    selection = TournamentSelection(rng=rng)
+    objective_function = AutomataObjectiveFunction(
+        CellularAutomata(30, table_size_cap=0),
+        HammingSimilarity(),
+        rng.integers(2, size=60, dtype=np.int8),
+        5,
+    )
+    batch_function = objective_function.get_batch_function()
+    children = np.empty_like(population)
+
+    def generation() -> None:
+        crossover(population, out=children)
+        mutation(children)
+        selection(children, batch_function(children), len(population))
+
+    return {
+        "RuleSet.__call__": (lambda: rule_set(stage), 1),
+        "RuleSet.get_part": (
+            lambda: [rule_set.get_part(padded, i) for i in range(len(stage))],
+            len(stage),
+        ),
+        "HammingSimilarity.__call__": (lambda: similarity(stage, ct), 1),
+        "StageRenderer.render_item": (
+            lambda: [StageRenderer.render_item(item) for item in items],
+            len(items),
+        ),
+        "BitflipMutation.__call__": (lambda: mutation(population), 1),
+        "TournamentSelection.__call__": (
+            lambda: selection(population, scores, len(population)),
+            1,
+        ),
+        "generation": (generation, 1),
+    }
+
+
+@beartype
+def time_workloads() -> Dict[str, float]:
+    """Time every workload under the policy of this process
+
+    ---
+    Returns:
+    Dict[str, float]
+        The best time per hot call in seconds, by workload name
+    """
+    timings = {}
+    for name, (workload, calls) in get_workloads().items():
+        best = min(timeit.repeat(workload, number=NUMBER, repeat=REPEAT))
+        timings[name] = best / (NUMBER * calls)
+    return timings
+
+
+@beartype
+def run_policy(policy: str) -> Dict[str, float]:
+    """Time the workloads in a new process with the given type checking policy
+
+    ---
+    Parameters:
+    policy: str
+        The policy to set in the environment of the process
+
+    ---
+    Returns:
+    Dict[str, float]
+        The best time per hot call in seconds, by workload name
+    """
+    environment = dict(os.environ, **{POLICY_VARIABLE: policy})
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.typechecking", "--worker"],
+        env=environment,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+@beartype
+def format_table(full: Dict[str, float], api: Dict[str, float]) -> List[str]:
+    """Format the timings of both policies as a table, with the overhead per call"""
+    lines = [
+        f"{'workload':<30}{'full (us)':>12}{'api (us)':>12}{'overhead':>12}{'ratio':>8}"
+    ]
+    for name in full:
+        overhead = full[name] - api[name]
+        lines.append(
+            f"{name:<30}{full[name] * 1e6:>12.2f}{api[name] * 1e6:>12.2f}"
+            f"{overhead * 1e6:>12.2f}{full[name] / api[name]:>8.2f}"
+        )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help=f"Time the workloads under the current {POLICY_VARIABLE} and print JSON",
+    )
+    arguments = parser.parse_args()
+
+    if arguments.worker:
+        print(json.dumps(time_workloads()))
+        return
+
+    full, api = run_policy("full"), run_policy("api")
+    print("\n".join(format_table(full, api)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from .automata import CellularAutomata, RuleSet
+from .bitsliced import BitslicedRuleSet
 from .objective_function import AutomataObjectiveFunction
+from .preimage import PreimageSolver
 from .similarity import (
     SimilarityMethod,
     HammingSimilarity,
@@ -7,16 +9,20 @@ from .similarity import (
     DamerauLevenshteinSimilarity,
     LCSSimilarity,
     GestaltSimilarity,
+    CompositeSimilarity,
 )
 
 __all__ = (
     "CellularAutomata",
     "RuleSet",
+    "BitslicedRuleSet",
     "AutomataObjectiveFunction",
+    "PreimageSolver",
     "SimilarityMethod",
     "HammingSimilarity",
     "LeeSimilarity",
     "DamerauLevenshteinSimilarity",
     "LCSSimilarity",
     "GestaltSimilarity",
+    "CompositeSimilarity",
 )
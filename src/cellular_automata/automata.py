@@ -1,23 +1,146 @@
 from __future__ import annotations
 
+import os
+
 import numpy as np
 from nptyping import NDArray
 from beartype import beartype
-from beartype.typing import List, Dict
+from beartype.typing import List, Dict, Optional, Tuple
+
+from .helpers import hot
+from .bitsliced import BitslicedRuleSet, WORD_SIZE
 
 
 class CellularAutomata:
     @beartype
-    def __init__(self, rule: int, k: int = 2, r: int = 1):
-        """A Cellular Atuomaton"""
+    def __init__(
+        self,
+        rule: int,
+        k: int = 2,
+        r: int = 1,
+        bitsliced: bool = True,
+        table_size_cap: int = 2**20,
+        cache_dir: Optional[str] = None,
+    ):
+        """A Cellular Atuomaton
+
+        ---
+        Parameters:
+        rule: int
+            The Wolfraam rule to use
+        k: int
+            The amount of dimensions to use
+        r: int
+            The radius to use
+        bitsliced: bool
+            Whether to evolve binary (k=2) automata on stages packed into 64-bit words
+            This is only done for stages wider than one word, where it is faster than tables
+        table_size_cap: int
+            The maximum size in bytes of a composed rule table used to jump multiple steps at once
+            Set to 0 to always evaluate one step at a time
+        cache_dir: Optional[str]
+            If set, the directory to store composed rule tables in, to reuse them between runs
+        """
         self.rule_set = RuleSet(rule, k, r)
+        self.bitsliced_rule_set = (
+            BitslicedRuleSet(self.rule_set.rule_table, r)
+            if bitsliced and k == 2
+            else None
+        )
+        self.table_size_cap = table_size_cap
+        self.cache_dir = cache_dir
+        self.composed_tables: Dict[int, Tuple[NDArray, NDArray, NDArray]] = {}
 
-    @beartype
+    @hot
     def __call__(self, stage: NDArray, t: int) -> NDArray:
         """Evaluate for T timesteps. Return Ct for a given C0."""
+        return self._evolve(stage, t)
+
+    @beartype
+    def evolve_population(self, population: NDArray, t: int) -> NDArray:
+        """Evaluate every row of a (pop_size, width) population for T timesteps at once.
+        Return the (pop_size, width) array of Ct for the given C0s.
+        """
+        return self._evolve(np.array(population, ndmin=2), t)
+
+    @hot
+    def _evolve(self, stages: NDArray, t: int) -> NDArray:
+        """Evaluate for T timesteps, jumping as many steps at once as the table size cap allows"""
+        if not self._is_bitsliced(stages):
+            while (steps := self.get_jump(t)) is not None:
+                stages = self.jump(stages, steps)
+                t -= steps
+        return self._step(stages, t)
+
+    @hot
+    def _step(self, stages: NDArray, t: int) -> NDArray:
+        """Evaluate for T timesteps, one step at a time"""
+        if self._is_bitsliced(stages):
+            return self.bitsliced_rule_set(stages, t)
         for _ in range(t):
-            stage = self.rule_set(stage)
-        return stage
+            stages = self.rule_set(stages)
+        return stages
+
+    @hot
+    def _is_bitsliced(self, stages: NDArray) -> bool:
+        """Whether to evaluate the stages packed into words, instead of with rule tables"""
+        return self.bitsliced_rule_set is not None and stages.shape[-1] > WORD_SIZE
+
+    @hot
+    def get_jump(self, t: int) -> Optional[int]:
+        """Get the largest amount of steps (at most t) with composed tables under the size cap
+        Returns None if jumping is not worth it (less than two steps)
+        """
+        steps = t
+        while steps >= 2 and self.get_jump_size(steps) > self.table_size_cap:
+            steps -= 1
+        return steps if steps >= 2 else None
+
+    @hot
+    def get_jump_size(self, steps: int) -> int:
+        """Get the size in bytes of the composed tables for jumping the given amount of steps"""
+        k, r = self.rule_set.k, self.rule_set.r
+        edge_size = k ** (r * (2 * steps - 1)) * r * (steps - 1)
+        return k ** (2 * r * steps + 1) + 2 * edge_size
+
+    @hot
+    def get_composed_tables(self, steps: int) -> Tuple[NDArray, NDArray, NDArray]:
+        """Get the composed table, and the left and right edge tables, for jumping the steps"""
+        if steps not in self.composed_tables:
+            self.composed_tables[steps] = tuple(
+                self.rule_set.get_composed_table(steps, self.cache_dir, edge)
+                for edge in (None, "left", "right")
+            )
+        return self.composed_tables[steps]
+
+    @hot
+    def jump(self, stages: NDArray, steps: int) -> NDArray:
+        """Evaluate for the given amount of steps at once, with composed rule tables
+
+        The composed table lets the cells outside of the stage evolve, instead of keeping them 0.
+        That only matters for the r * (steps - 1) cells at both edges,
+        which have their own tables that do keep the outside 0 at every step.
+        """
+        r = self.rule_set.r
+        reach = r * steps
+        band = r * (steps - 1)
+        edge_width = reach + band
+        width = stages.shape[-1]
+        if width < edge_width:
+            return self._step(stages, steps)
+
+        table, left, right = self.get_composed_tables(steps)
+
+        result = np.empty_like(stages)
+        padded = self.rule_set.pad(stages, r)
+        indices = self.rule_set.get_indices(padded, 2 * reach + 1)
+        result[..., band : width - band] = table[indices]
+
+        indices = self.rule_set.get_indices(stages[..., :edge_width], edge_width)
+        result[..., :band] = left[indices[..., 0]]
+        indices = self.rule_set.get_indices(stages[..., -edge_width:], edge_width)
+        result[..., width - band :] = right[indices[..., 0]]
+        return result
 
 
 class RuleSet:
@@ -28,6 +151,7 @@ class RuleSet:
         self.k = k
         self.r = r
         self.rule_dict = self.get_ruleset_dict(rule, k, r)
+        self.rule_table = self.get_ruleset_table(rule, k, r)
 
     @beartype
     @staticmethod
@@ -48,17 +172,116 @@ class RuleSet:
         return rule_dict
 
     @beartype
+    @classmethod
+    def get_ruleset_table(cls, rule: int, k: int = 2, r: int = 1) -> NDArray:
+        """Get the ruleset as a lookup table, indexed by the base-k value of a neighbourhood"""
+        return np.asarray(cls.get_ruleset(rule, k, r), dtype=np.int8)
+
+    @hot
     def __call__(self, stage: NDArray) -> NDArray:
         """Call the cellular attomaton once on the stage
         Overwrites the input stage
+        The stage can also be a 2-D array, in which case every row is a stage
         """
-        padded_copy = np.pad(stage, [self.r, self.r])
-        for i in range(len(stage)):
-            stage[i] = self.rule_dict[self.get_part(padded_copy, i)]
+        padded_copy = self.pad(stage, self.r)
+        stage[...] = self.rule_table[self.get_indices(padded_copy)]
 
         return stage
 
+    @hot
+    @staticmethod
+    def pad(stage: NDArray, width: int) -> NDArray:
+        """Get a copy of the stage with width zeros at both ends of the last axis
+        Equivalent to np.pad, which has a large overhead for small stages
+        """
+        shape = stage.shape[:-1] + (stage.shape[-1] + 2 * width,)
+        padded = np.zeros(shape, dtype=stage.dtype)
+        padded[..., width : width + stage.shape[-1]] = stage
+        return padded
+
+    @hot
+    def get_indices(self, padded: NDArray, width: Optional[int] = None) -> NDArray:
+        """Gets the rule table index of every target of the stage at once
+        Assumes the stage is padded (and therefore offset) according to self.r
+        width is the size of a target, which is 2 * r + 1 unless given otherwise
+        """
+        width = 2 * self.r + 1 if width is None else width
+        length = padded.shape[-1] - width + 1
+
+        # The indices of all targets a power of two wide are combined from their two halves,
+        # so that even wide targets only take a logarithmic amount of array operations.
+        powers = {1: padded.astype(np.intp)}
+        size = 1
+        while size * 2 <= width:
+            half = powers[size]
+            powers[size * 2] = half[..., :-size] * self.k**size + half[..., size:]
+            size *= 2
+
+        indices = None
+        offset = 0
+        for size in sorted(powers, reverse=True):
+            if width & size:
+                part = powers[size][..., offset : offset + length]
+                indices = part if indices is None else indices * self.k**size + part
+                offset += size
+        return indices
+
     @beartype
+    def get_composed_table(
+        self, steps: int, cache_dir: Optional[str] = None, edge: Optional[str] = None
+    ) -> NDArray:
+        """Get the rule table of applying this ruleset the given amount of times
+
+        By default, this is the table of a ruleset with radius r * steps,
+        which lets the cells outside of the stage evolve as well.
+        With edge set to "left" or "right", this is instead the table of the r * (steps - 1)
+        cells at that edge of the stage, indexed by the r * (2 * steps - 1) cells at that edge,
+        which keeps the cells outside of the stage 0 at every step, like __call__ does.
+
+        If cache_dir is set, the table is loaded from there, or stored there once built.
+        """
+        path = None
+        if cache_dir is not None:
+            name = f"rule{self.rule}_k{self.k}_r{self.r}_t{steps}"
+            path = os.path.join(cache_dir, name if edge is None else f"{name}_{edge}")
+            path = f"{path}.npy"
+            if os.path.exists(path):
+                return np.load(path)
+
+        paddings = {None: (0, 0), "left": (self.r, 0), "right": (0, self.r)}
+        if edge not in paddings:
+            raise ValueError(f"Unknown edge {edge}")
+        padding = paddings[edge]
+        width = 2 * self.r * steps + 1 if edge is None else self.r * (2 * steps - 1)
+        outputs = width - (2 * self.r - sum(padding)) * steps
+
+        weights = self.k ** np.arange(width - 1, -1, -1)
+        table = np.empty((self.k**width, outputs), dtype=np.int8)
+
+        # Every index is written out as its neighbourhood and evaluated, in chunks,
+        # to keep the memory use at a constant multiple of the chunk size.
+        chunk_size = 2**16
+        for start in range(0, len(table), chunk_size):
+            indices = np.arange(start, min(start + chunk_size, len(table)))
+            neighbourhoods = (indices[:, np.newaxis] // weights) % self.k
+            for _ in range(steps):
+                padded = np.pad(neighbourhoods, [(0, 0), padding])
+                neighbourhoods = self.rule_table[self.get_indices(padded)]
+            table[start : start + chunk_size] = neighbourhoods
+
+        if edge is None:
+            table = table[:, 0]
+
+        if path is not None:
+            # Written under a temporary name first, so parallel runs never read half a table
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary_path = f"{path}.{os.getpid()}.tmp"
+            with open(temporary_path, "wb") as f:
+                np.save(f, table)
+            os.replace(temporary_path, path)
+        return table
+
+    @hot
     def get_part(self, padded: NDArray, i: int) -> str:
         """Gets the i'th target of the stage
         Assumes the stage is padded (and therefore offset) according to self.r
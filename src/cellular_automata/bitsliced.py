@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import numpy as np
+from nptyping import NDArray
+from beartype import beartype
+from beartype.typing import Dict, List, Optional, Tuple, Union
+
+from .helpers import hot
+
+WORD_SIZE = 64
+
+
+class BitslicedRuleSet:
+    @beartype
+    def __init__(self, rule_table: NDArray, r: int = 1):
+        """A binary (k=2) Wolfraam ruleset that works on stages packed into 64-bit words
+        Every step updates 64 cells per operation, by evaluating the rule as a boolean
+        expression over the packed stage shifted to each of the neighbours.
+
+        ---
+        Parameters:
+        rule_table: NDArray
+            The rule table of a k=2 ruleset, as given by RuleSet.get_ruleset_table
+        r: int
+            The radius of the ruleset
+        """
+        if r >= WORD_SIZE:
+            raise ValueError(f"The radius has to be smaller than {WORD_SIZE}")
+        if len(rule_table) != 2 ** (2 * r + 1):
+            raise ValueError("The rule table does not belong to a k=2 ruleset")
+
+        self.r = r
+        self.expression = self.get_expression(rule_table)
+
+    @beartype
+    @classmethod
+    def get_expression(
+        cls,
+        table: NDArray,
+        variable: int = 0,
+        known: Optional[Dict[Tuple[int, bytes], Union[int, Tuple]]] = None,
+    ) -> Union[int, Tuple]:
+        """Derive the boolean expression of a rule table by Shannon expansion
+        The expression is either a constant (0 or 1), or a tuple of
+        (variable, expression if the variable is 1, expression if it is 0).
+        The variables are the neighbours, most significant (left-most) first.
+        Identical or constant halves of the table are collapsed to keep the expression small,
+        and equal sub-expressions are the same object, so they are only evaluated once.
+        """
+        if not table.any():
+            return 0
+        if table.all():
+            return 1
+
+        known = {} if known is None else known
+        key = (variable, table.tobytes())
+        if key not in known:
+            half = len(table) // 2
+            if_zero = cls.get_expression(table[:half], variable + 1, known)
+            if_one = cls.get_expression(table[half:], variable + 1, known)
+            known[key] = if_zero if if_zero is if_one else (variable, if_one, if_zero)
+        return known[key]
+
+    @hot
+    @staticmethod
+    def pack(stage: NDArray) -> NDArray:
+        """Pack the last axis of a binary stage into little-endian 64-bit words
+        Cell i ends up as bit (i % 64) of word (i // 64). Unused bits are 0.
+        """
+        packed = np.packbits(stage.astype(bool), axis=-1, bitorder="little")
+        byte_padding = -packed.shape[-1] % (WORD_SIZE // 8)
+        packed = np.pad(packed, [(0, 0)] * (packed.ndim - 1) + [(0, byte_padding)])
+        return packed.view(np.uint64)
+
+    @hot
+    @staticmethod
+    def unpack(words: NDArray, width: int) -> NDArray:
+        """Unpack little-endian 64-bit words to a stage of the given width"""
+        bits = np.unpackbits(words.view(np.uint8), axis=-1, bitorder="little")
+        return bits[..., :width]
+
+    @hot
+    @staticmethod
+    def get_mask(width: int) -> NDArray:
+        """Get the words with a 1 for every bit that represents a cell"""
+        return BitslicedRuleSet.pack(np.ones(width, dtype=np.int8))
+
+    @hot
+    @staticmethod
+    def shift(words: NDArray, offset: int) -> NDArray:
+        """Get the packed stage where bit i holds cell i + offset
+        Cells that fall off the stage are 0, which is the padding of RuleSet
+        """
+        if offset == 0:
+            return words
+
+        amount = np.uint64(abs(offset))
+        carry_amount = np.uint64(WORD_SIZE - abs(offset))
+        neighbours = np.zeros_like(words)
+        if offset > 0:
+            neighbours[..., :-1] = words[..., 1:]
+            return (words >> amount) | (neighbours << carry_amount)
+        else:
+            neighbours[..., 1:] = words[..., :-1]
+            return (words << amount) | (neighbours >> carry_amount)
+
+    @hot
+    def step(self, words: NDArray, mask: NDArray) -> NDArray:
+        """Call the cellular automaton once on a packed stage
+        mask has to be the result of get_mask for the width of the stage
+        """
+        neighbours = [self.shift(words, j - self.r) for j in range(2 * self.r + 1)]
+        result = self._evaluate(self.expression, neighbours, {})
+        if isinstance(result, int):
+            result = np.full_like(words, np.iinfo(np.uint64).max if result else 0)
+        return result & mask
+
+    @hot
+    def _evaluate(
+        self,
+        expression: Union[int, Tuple],
+        neighbours: List[NDArray],
+        known: Dict[int, NDArray],
+    ) -> Union[int, NDArray]:
+        """Evaluate the expression on the shifted stages
+        Shared sub-expressions are only evaluated once, by remembering them in known
+        """
+        if isinstance(expression, int):
+            return expression
+        if id(expression) in known:
+            return known[id(expression)]
+
+        variable, if_one, if_zero = expression
+        x = neighbours[variable]
+        one = self._evaluate(if_one, neighbours, known)
+        zero = self._evaluate(if_zero, neighbours, known)
+
+        if isinstance(one, int) and isinstance(zero, int):
+            result = x if one else ~x
+        elif isinstance(one, int):
+            result = (x | zero) if one else (~x & zero)
+        elif isinstance(zero, int):
+            result = (~x | one) if zero else (x & one)
+        else:
+            result = (x & one) | (~x & zero)
+
+        known[id(expression)] = result
+        return result
+
+    @hot
+    def __call__(self, stage: NDArray, t: int) -> NDArray:
+        """Evaluate for T timesteps. Return Ct for a given C0.
+        The stage can also be a 2-D array, in which case every row is a stage
+        """
+        if t == 0:
+            return stage
+
+        width = stage.shape[-1]
+        mask = self.get_mask(width)
+        words = self.pack(stage)
+        for _ in range(t):
+            words = self.step(words, mask)
+        return self.unpack(words, width).astype(stage.dtype)
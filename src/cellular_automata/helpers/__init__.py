@@ -1,3 +1,31 @@
-from .allignment import damerau_levenshtein, damerau_levenshtein_imported
+from .typechecking import POLICY, POLICY_VARIABLE, hot
+from .allignment import (
+    damerau_levenshtein,
+    damerau_levenshtein_imported,
+    damerau_levenshtein_batch,
+    get_match_masks,
+)
+from .matching import (
+    AUTOJUNK_LENGTH,
+    get_symbol_index,
+    common_suffix_lengths,
+    longest_match_batch,
+    matching_characters_batch,
+)
+from .cache import EvaluationCache
 
-__all__ = ("damerau_levenshtein", "damerau_levenshtein_imported")
+__all__ = (
+    "POLICY",
+    "POLICY_VARIABLE",
+    "hot",
+    "damerau_levenshtein",
+    "damerau_levenshtein_imported",
+    "damerau_levenshtein_batch",
+    "get_match_masks",
+    "AUTOJUNK_LENGTH",
+    "get_symbol_index",
+    "common_suffix_lengths",
+    "longest_match_batch",
+    "matching_characters_batch",
+    "EvaluationCache",
+)
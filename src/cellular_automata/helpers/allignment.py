@@ -3,14 +3,18 @@ from __future__ import annotations
 import numpy as np
 from nptyping import NDArray
 from beartype import beartype
+from beartype.typing import Optional
 from pyxdameraulevenshtein import damerau_levenshtein_distance
 
+from .typechecking import hot
+
+
 # Written here because importing a library for it might not be "plain python."
 # Algorithm is a litteral implementation of the Damerau paper's description.
 # However, we do not use it, as it is too slow, and download a Cython extension instead.
-@beartype
+@hot
 def damerau_levenshtein(x: NDArray, y: NDArray) -> int:
-    matrix = np.zeros((len(x) + 1, len(y) + 1), dtype=np.int8)
+    matrix = np.zeros((len(x) + 1, len(y) + 1), dtype=np.int64)
 
     for i in range(len(x) + 1):
         matrix[i, 0] = i
@@ -18,8 +22,8 @@ def damerau_levenshtein(x: NDArray, y: NDArray) -> int:
     for j in range(len(y) + 1):
         matrix[0, j] = j
 
-    for i in range(len(x) + 1):
-        for j in range(len(y) + 1):
+    for i in range(1, len(x) + 1):
+        for j in range(1, len(y) + 1):
             cost = 0 if x[i - 1] == y[j - 1] else 1
 
             matrix[i, j] = min(
@@ -46,6 +50,95 @@ def damerau_levenshtein(x: NDArray, y: NDArray) -> int:
     return int(matrix[len(x), len(y)])
 
 
-@beartype
+@hot
 def damerau_levenshtein_imported(x: NDArray, y: NDArray) -> int:
     return damerau_levenshtein_distance(x, y)
+
+
+WORD_SIZE = 64
+
+
+@hot
+def get_match_masks(x: NDArray) -> NDArray:
+    """Get the bit-parallel match masks of a non-negative integer sequence
+    ---
+    Returns:
+    NDArray
+        (symbols + 1, words) array of uint64, where bit i % 64 of word i // 64 of row c
+        is set when x[i] == c. The last row is empty, for symbols that are not in x.
+    """
+    words = max(1, -(-len(x) // WORD_SIZE))
+    symbols = int(x.max()) + 1 if len(x) else 0
+    bits = np.zeros((symbols + 1, words * WORD_SIZE), dtype=np.uint8)
+    bits[x, np.arange(len(x))] = 1
+    return np.packbits(bits, axis=-1, bitorder="little").view(np.uint64)
+
+
+@hot
+def damerau_levenshtein_batch(
+    x: NDArray, ys: NDArray, masks: Optional[NDArray] = None
+) -> NDArray:
+    """The Damerau Levenshtein (optimal string alignment) distance of x to every row of ys
+    Bit-parallel algorithm of Hyyro (2003), with the columns of the dynamic programming
+    matrix packed into 64-bit words, and every row of ys processed at once.
+    ---
+    Parameters:
+    x: NDArray
+        The sequence to compare to, of non-negative integers
+    ys: NDArray
+        2-D array of sequences of non-negative integers, one per row
+    masks: Optional[NDArray]
+        The result of get_match_masks(x), if it is already known
+    ---
+    Returns:
+    NDArray
+        The int64 distance of every row
+    """
+    distances = np.full(len(ys), len(x), dtype=np.int64)
+    if len(x) == 0:
+        return distances + ys.shape[-1]
+
+    masks = get_match_masks(x) if masks is None else masks
+    words = masks.shape[1]
+    one, top = np.uint64(1), np.uint64(WORD_SIZE - 1)
+    last = np.uint64(1 << ((len(x) - 1) % WORD_SIZE))
+    # Symbols that are not in x match nothing
+    symbols = np.minimum(ys, len(masks) - 1)
+
+    shape = (words + 1, len(ys))
+    vp = np.full(shape, np.iinfo(np.uint64).max, dtype=np.uint64)
+    vn = np.zeros(shape, dtype=np.uint64)
+    d0 = np.zeros(shape, dtype=np.uint64)
+    pm = np.zeros(shape, dtype=np.uint64)
+    # Word 0 is a sentinel, so every word can look at the one before it
+    old_d0 = np.zeros(shape, dtype=np.uint64)
+    old_pm = np.zeros(shape, dtype=np.uint64)
+
+    for column in symbols.T:
+        old_d0[:] = d0
+        old_pm[:] = pm
+        hp_carry = np.ones(len(ys), dtype=np.uint64)
+        hn_carry = np.zeros(len(ys), dtype=np.uint64)
+        for word in range(1, words + 1):
+            pm_j = masks[column, word - 1]
+            # Transpositions, also across the border with the previous word
+            tr = (
+                ((~old_d0[word] & pm_j) << one)
+                | ((~old_d0[word - 1] & pm[word - 1]) >> top)
+            ) & old_pm[word]
+            x_j = pm_j | hn_carry
+            d0_j = (((x_j & vp[word]) + vp[word]) ^ vp[word]) | x_j | vn[word] | tr
+            hp = vn[word] | ~(d0_j | vp[word])
+            hn = d0_j & vp[word]
+            if word == words:
+                distances += (hp & last) != 0
+                distances -= (hn & last) != 0
+
+            hp, hp_carry = (hp << one) | hp_carry, hp >> top
+            hn, hn_carry = (hn << one) | hn_carry, hn >> top
+            vp[word] = hn | ~(d0_j | hp)
+            vn[word] = hp & d0_j
+            d0[word] = d0_j
+            pm[word] = pm_j
+
+    return distances
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import numpy as np
+from nptyping import NDArray
+from beartype import beartype
+from beartype.typing import Any, Optional
+
+from .typechecking import hot
+
+
+class EvaluationCache:
+    @beartype
+    def __init__(self, max_size: int) -> None:
+        """A bounded memo cache that evicts the least recently used entry when full
+
+        ---
+        Parameters:
+        max_size: int
+            The maximum amount of entries to keep
+        """
+        if max_size < 1:
+            raise ValueError("The cache should be able to hold at least one entry")
+
+        self.max_size = max_size
+        self.entries: OrderedDict[bytes, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @hot
+    @staticmethod
+    def key(genome: NDArray) -> bytes:
+        """The key of a genome: its raw bytes, independent of the input dtype"""
+        return np.ascontiguousarray(genome, dtype=np.int8).tobytes()
+
+    @hot
+    def get(self, key: bytes) -> Optional[Any]:
+        """Get the entry for the key, or None if it is not cached
+        Counts as a hit or a miss, and marks the entry as most recently used
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    @hot
+    def put(self, key: bytes, value: Any) -> None:
+        """Store an entry, evicting the least recently used one if the cache is full"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self.entries)
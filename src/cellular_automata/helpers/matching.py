@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import numpy as np
+from nptyping import NDArray
+from beartype import beartype
+from beartype.typing import Optional
+
+from .typechecking import hot
+
+# difflib.SequenceMatcher ignores "popular" elements of sequences of at least this length
+# (autojunk), which the functions here do not emulate.
+AUTOJUNK_LENGTH = 200
+
+
+@hot
+def get_symbol_index(x: NDArray) -> NDArray:
+    """Get the positions of every symbol in a non-negative integer sequence
+    ---
+    Returns:
+    NDArray
+        (symbols + 1, len(x)) boolean array, where row c is x == c.
+        The last row is empty, for symbols that are not in x.
+    """
+    symbols = int(x.max()) + 1 if len(x) else 0
+    return np.arange(symbols + 1)[:, np.newaxis] == x
+
+
+@hot
+def common_suffix_lengths(
+    x: NDArray, ys: NDArray, index: Optional[NDArray] = None
+) -> NDArray:
+    """Get the length of the common substring of x and every row of ys ending at each pair
+    of positions
+    ---
+    Parameters:
+    x: NDArray
+        The sequence to compare to, of non-negative integers
+    ys: NDArray
+        2-D array of sequences of non-negative integers, one per row
+    index: Optional[NDArray]
+        The result of get_symbol_index(x), if it is already known
+    ---
+    Returns:
+    NDArray
+        (len(ys), len(x), width of ys) array, where [p, i, j] is the length of the longest
+        common substring of x and ys[p] that ends at x[i] and ys[p, j]
+    """
+    index = get_symbol_index(x) if index is None else index
+    equal = index[np.minimum(ys, len(index) - 1)].transpose(0, 2, 1)
+
+    lengths = np.zeros(equal.shape, dtype=np.int32)
+    if len(x) == 0 or ys.shape[-1] == 0:
+        return lengths
+    lengths[:, 0] = equal[:, 0]
+    for i in range(1, len(x)):
+        lengths[:, i, 0] = equal[:, i, 0]
+        lengths[:, i, 1:] = (lengths[:, i - 1, :-1] + 1) * equal[:, i, 1:]
+    return lengths
+
+
+@hot
+def longest_match_batch(
+    x: NDArray,
+    ys: NDArray,
+    index: Optional[NDArray] = None,
+    lengths: Optional[NDArray] = None,
+) -> NDArray:
+    """The length of the longest common substring of x and every row of ys
+    This is the size of difflib.SequenceMatcher(None, x, y).find_longest_match(),
+    as long as the rows are shorter than AUTOJUNK_LENGTH.
+    lengths can be given if the result of common_suffix_lengths is already known.
+    """
+    lengths = common_suffix_lengths(x, ys, index) if lengths is None else lengths
+    if lengths.size == 0:
+        return np.zeros(len(ys), dtype=np.int64)
+    return lengths.max(axis=(1, 2)).astype(np.int64)
+
+
+@hot
+def matching_characters_batch(
+    x: NDArray,
+    ys: NDArray,
+    index: Optional[NDArray] = None,
+    lengths: Optional[NDArray] = None,
+) -> NDArray:
+    """The amount of characters in the Ratcliff/Obershelp matching blocks of x and every
+    row of ys, which is the sum of the sizes of difflib.SequenceMatcher(None, x, y)
+    .get_matching_blocks(), as long as the rows are shorter than AUTOJUNK_LENGTH.
+
+    Like difflib, the longest match is taken recursively, left and right of the previous
+    matches. Ties go to the match that starts earliest in x, and then earliest in y.
+    All pending ranges of all rows are split at once.
+    lengths can be given if the result of common_suffix_lengths is already known.
+    """
+    matches = np.zeros(len(ys), dtype=np.int64)
+    lengths = common_suffix_lengths(x, ys, index) if lengths is None else lengths
+    if lengths.size == 0:
+        return matches
+
+    rows, n, m = lengths.shape
+    # Ties are broken by encoding the position in the key, lower positions being better
+    scale = n * m + 1
+    key_type = np.int32 if scale * (min(n, m) + 1) < 2**31 else np.int64
+    j = np.arange(m, dtype=key_type)
+
+    # The pending ranges, as arrays of (row, alo, ahi, blo, bhi)
+    ranges = np.array([[row, 0, n, 0, m] for row in range(rows)], dtype=np.int64)
+    while len(ranges):
+        row, alo, ahi, blo, bhi = ranges.T
+        # Every position of x in every range, grouped by range
+        sizes = ahi - alo
+        ids = np.repeat(np.arange(len(ranges)), sizes)
+        offsets = np.arange(len(ids)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        i = alo[ids] + offsets
+
+        # Matches are clipped to start within their range
+        clipped = lengths[row[ids], i].astype(key_type, copy=False)
+        np.minimum(clipped, (offsets + 1).astype(key_type)[:, np.newaxis], out=clipped)
+        np.minimum(
+            clipped, j - (blo[ids] - 1).astype(key_type)[:, np.newaxis], out=clipped
+        )
+        clipped[j >= bhi[ids, np.newaxis]] = 0
+        keys = clipped * key_type(scale) - (i * m).astype(key_type)[:, np.newaxis] - j
+        keys[clipped <= 0] = -1
+        best = np.maximum.reduceat(keys.max(axis=-1), np.cumsum(sizes) - sizes)
+        best = best.astype(np.int64)
+
+        found = best >= 0
+        size = -(-best[found] // scale)
+        position = size * scale - best[found]
+        start_a = position // m - size + 1
+        start_b = position % m - size + 1
+        np.add.at(matches, row[found], size)
+
+        row, alo, ahi, blo, bhi = (column[found] for column in ranges.T)
+        left = np.stack([row, alo, start_a, blo, start_b], axis=1)
+        right = np.stack([row, start_a + size, ahi, start_b + size, bhi], axis=1)
+        ranges = np.concatenate([left, right])
+        ranges = ranges[(ranges[:, 1] < ranges[:, 2]) & (ranges[:, 3] < ranges[:, 4])]
+
+    return matches
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+
+from beartype import beartype
+from beartype.typing import Callable, TypeVar
+
+# Set to "api" before importing the packages, to only type check their public API.
+# By default ("full"), every function is checked.
+POLICY_VARIABLE = "NATURALCOMPUTING_TYPECHECK"
+POLICIES = ("full", "api")
+
+Function = TypeVar("Function", bound=Callable)
+
+
+@beartype
+def get_policy() -> str:
+    """Get the type checking policy from the environment
+    ---
+    Returns:
+    str
+        "full" to check every function, "api" to leave the hot functions unchecked
+    """
+    policy = os.environ.get(POLICY_VARIABLE, "full").strip().lower()
+    if policy not in POLICIES:
+        raise ValueError(f"{POLICY_VARIABLE} should be one of {POLICIES}, not {policy}")
+    return policy
+
+
+# Read once, at import time, as the decorators are applied when the modules are imported
+POLICY = get_policy()
+
+
+def hot(function: Function) -> Function:
+    """Decorate a function that is called in inner loops, instead of with beartype
+    It is only checked with the "full" policy, otherwise it is returned as is,
+    without any wrapper. Like beartype, it also takes static and class methods.
+    """
+    if POLICY == "full":
+        return beartype(function)
+    return function
@@ -3,10 +3,11 @@ from __future__ import annotations
 import numpy as np
 from nptyping import NDArray
 from beartype import beartype
-from beartype.typing import List, Callable
+from beartype.typing import Dict, Callable, Optional
 
 from .automata import CellularAutomata
 from .similarity import SimilarityMethod
+from .helpers import EvaluationCache, hot
 
 
 class AutomataObjectiveFunction:
@@ -17,6 +18,7 @@ class AutomataObjectiveFunction:
         similarity: SimilarityMethod,
         ct: NDArray,
         t: int,
+        cache_size: Optional[int] = None,
     ) -> None:
         """Automata objective function: calculate the quality if the input
 
@@ -30,11 +32,37 @@ class AutomataObjectiveFunction:
             the expected result
         t: int
             the amount of steps to take to get to the expected result
+        cache_size: Optional[int]
+            If set, remember the results of up to this many C0s, evicting the least
+            recently used ones first
         """
         self.similarity = similarity
         self.ca = ca
         self.ct = ct
         self.t = t
+        self.cache = None if cache_size is None else EvaluationCache(cache_size)
+        self.prefetched: Dict[bytes, float] = {}
+
+    @hot
+    def simulate(self, c0_prime: NDArray) -> NDArray:
+        """Get the Ct' of a C0', from the cache if possible
+        ---
+        Parameters:
+        c0_prime: NDArray
+            The C0' to evaluate for t steps
+        ---
+        Returns
+        NDArray, which must not be modified, as it can be shared with the cache"""
+        if self.cache is None:
+            return self.ca(np.copy(c0_prime), self.t)
+
+        key = self.cache.key(c0_prime)
+        ct_prime = self.cache.get(key)
+        if ct_prime is None:
+            ct_prime = self.ca(np.copy(c0_prime), self.t)
+            ct_prime.setflags(write=False)
+            self.cache.put(key, ct_prime)
+        return ct_prime
 
     @beartype
     def get_function(self) -> Callable:
@@ -48,12 +76,61 @@ class AutomataObjectiveFunction:
         """
 
         def objective_function(c0_prime: NDArray) -> float:
-            ct_prime = self.ca(c0_prime, self.t)
+            if self.prefetched:
+                score = self.prefetched.get(EvaluationCache.key(c0_prime))
+                if score is not None:
+                    return score
+            ct_prime = self.simulate(c0_prime)
             return self.similarity(self.ct, ct_prime)
 
         return objective_function
 
     @beartype
+    def get_batch_function(self) -> Callable:
+        """
+        Return an objective function that scores a whole (pop_size, width) population at once.
+
+        Returns
+        -------
+        Callable
+            The batch objective function to use, returning an array of scores.
+            It is a bound method, so it can be pickled with the objective function,
+            for example as part of a GeneticAlgorithm sent to a worker process.
+        """
+        return self.batch_objective_function
+
+    @hot
+    def batch_objective_function(self, population: NDArray) -> NDArray:
+        """Score a whole (pop_size, width) population at once
+        ---
+        Parameters:
+        population: NDArray
+            The C0's to score
+        ---
+        Returns
+        NDArray of the score of every C0', alligned by index"""
+        ct_primes = self.ca.evolve_population(population, self.t)
+        return self.similarity.batch(self.ct, ct_primes)
+
+    @hot
+    def prefetch(self, population: NDArray, scores: NDArray) -> None:
+        """Hand the scores of a population that was evaluated in one batch to the function
+        of get_function, so it returns them without simulating the individuals again.
+        This way, a problem that wraps that function still logs every evaluation.
+        Only the scores of the last prefetched population are kept.
+        ---
+        Parameters:
+        population: NDArray
+            The (pop_size, width) population that was evaluated
+        scores: NDArray
+            The scores of each individual, alligned by index
+        """
+        self.prefetched = {
+            EvaluationCache.key(c0_prime): float(score)
+            for c0_prime, score in zip(population, scores)
+        }
+
+    @hot
     def is_optimal(self, c0_prime: NDArray) -> bool:
         """Is the current best optimal?
         ---
@@ -63,5 +140,5 @@ class AutomataObjectiveFunction:
         ---
         Returns
         bool"""
-        ct_prime = self.ca(c0_prime, self.t)
-        return all([(x == y) for x, y in zip(self.ct, ct_prime)])
+        ct_prime = self.simulate(c0_prime)
+        return bool(np.array_equal(self.ct, ct_prime))
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from nptyping import NDArray
+from beartype import beartype
+from beartype.typing import Dict, Iterator, List, Optional, Tuple
+
+from .helpers import hot
+from .automata import CellularAutomata
+from .objective_function import AutomataObjectiveFunction
+
+
+class PreimageSolver:
+    @beartype
+    def __init__(
+        self,
+        ca: CellularAutomata,
+        ct: NDArray,
+        t: int,
+        table_size_cap: int = 2**12,
+        timeout: Optional[float] = 60.0,
+    ) -> None:
+        """Exact solver for the C0s that evolve to a given Ct
+
+        Works backwards, as many steps at a time as the table size cap allows.
+        The preimages of such a jump are the paths through the de Bruijn graph of overlapping
+        neighbourhoods that produce the stage, where the cells outside of the stage are 0,
+        like the padding of RuleSet.
+
+        When t takes more than one jump, the search backtracks over the jumps, which can
+        take exponentially long. For r = 1 and the 60 cell stages of ca_input.csv,
+        first() takes milliseconds for k = 2 up to t = 25, and seconds for t = 99.
+        For k = 3 it takes milliseconds for t = 1, and under a second for t = 5.
+        k = 3 with t = 25 or t = 99 is out of reach, and runs into the timeout.
+
+        ---
+        Parameters:
+        ca: CellularAutomata
+            The Cellular Automata that evolves C0 to Ct
+        ct: NDArray
+            the expected result
+        t: int
+            the amount of steps to take to get to the expected result
+        table_size_cap: int
+            The maximum size of the composed rule table of a jump, when t takes multiple jumps
+            Larger jumps prune more dead ends at once, but every stage they visit is slower.
+            If all t steps fit in the table size cap of the CA, they are taken in one jump,
+            as there is no backtracking over a single jump.
+        timeout: Optional[float]
+            The seconds that first, exists, count or an iteration over the preimages can
+            take, before they raise a TimeoutError. No limit if None.
+        """
+        self.ca = ca
+        self.ct = ct
+        self.t = t
+        self.table_size_cap = table_size_cap
+        self.timeout = timeout
+        self.deadline: Optional[float] = None
+        self.graphs: Dict[int, Tuple[NDArray, NDArray]] = {}
+
+    @beartype
+    @classmethod
+    def from_objective_function(
+        cls,
+        objective_function: AutomataObjectiveFunction,
+        timeout: Optional[float] = 60.0,
+    ) -> PreimageSolver:
+        """Get the solver for the problem an objective function scores C0s on"""
+        return cls(
+            objective_function.ca,
+            objective_function.ct,
+            objective_function.t,
+            timeout=timeout,
+        )
+
+    @beartype
+    def __iter__(self) -> Iterator[NDArray]:
+        """Iterate over all C0s that evolve to Ct in t steps"""
+        self._start()
+        return self._preimages(self.ct, self.t)
+
+    @beartype
+    def first(self) -> Optional[NDArray]:
+        """Get the first C0 that evolves to Ct in t steps, or None if there are none"""
+        return next(iter(self), None)
+
+    @beartype
+    def exists(self) -> bool:
+        """Whether there is any C0 that evolves to Ct in t steps"""
+        return self.first() is not None
+
+    @beartype
+    def count(self) -> int:
+        """Count the C0s that evolve to Ct in t steps
+        Only the last jump is counted without enumerating its preimages,
+        so this can take long if t does not fit in one jump and there are many preimages.
+        """
+        self._start()
+        return self._count(self.ct, self.t)
+
+    @hot
+    def _start(self) -> None:
+        """Start the clock of the timeout"""
+        self.deadline = (
+            None if self.timeout is None else time.monotonic() + self.timeout
+        )
+
+    @hot
+    def _check_deadline(self) -> None:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimeoutError(
+                f"The preimages of a stage of {len(self.ct)} cells of k = "
+                f"{self.ca.rule_set.k}, r = {self.ca.rule_set.r} over t = {self.t} steps "
+                f"were not found within {self.timeout} seconds"
+            )
+
+    @hot
+    def _preimages(self, stage: NDArray, t: int) -> Iterator[NDArray]:
+        if t == 0:
+            yield stage
+            return
+        steps = self.get_steps(t, len(stage))
+        for preimage in self.jump_preimages(stage, steps):
+            yield from self._preimages(preimage, t - steps)
+
+    @hot
+    def _count(self, stage: NDArray, t: int) -> int:
+        if t == 0:
+            return 1
+        steps = self.get_steps(t, len(stage))
+        if steps == t:
+            return self.count_jump_preimages(stage, steps)
+        return sum(
+            self._count(preimage, t - steps)
+            for preimage in self.jump_preimages(stage, steps)
+        )
+
+    @hot
+    def get_steps(self, t: int, width: int) -> int:
+        """Get the amount of steps to go back at once, for a stage of the given width"""
+        k, r = self.ca.rule_set.k, self.ca.rule_set.r
+        # The edge tables have to fit in the stage
+        if k ** (2 * r * t + 1) <= self.ca.table_size_cap and r * (2 * t - 1) <= width:
+            return t
+
+        steps = t
+        while steps > 1 and (
+            k ** (2 * r * steps + 1) > self.table_size_cap
+            or r * (2 * steps - 1) > width
+        ):
+            steps -= 1
+        return steps
+
+    @hot
+    def step_preimages(self, stage: NDArray) -> Iterator[NDArray]:
+        """Iterate over all stages that evolve to the given stage in one step"""
+        return self.jump_preimages(stage, 1)
+
+    @hot
+    def count_step_preimages(self, stage: NDArray) -> int:
+        """Count the stages that evolve to the given stage in one step"""
+        return self.count_jump_preimages(stage, 1)
+
+    @hot
+    def jump_preimages(self, stage: NDArray, steps: int) -> Iterator[NDArray]:
+        """Iterate over all stages that evolve to the given stage in the given amount of steps"""
+        k, reach, band = self._get_sizes(steps)
+        results, next_states = self._get_graph(steps)
+        width = len(stage)
+        live = self._get_live(stage, steps)
+
+        # Depth first search over the live part of the graph, which only has complete paths.
+        # padded holds the cells of the current path, with r cells of padding on both sides:
+        # the state at position i is padded[i:i + 2 * reach]
+        r = self.ca.rule_set.r
+        padded = np.zeros(width + 2 * r, dtype=np.int8)
+        stack = [(0, int(state)) for state in reversed(np.flatnonzero(live[0]))]
+        while stack:
+            self._check_deadline()
+            i, state = stack.pop()
+            if i == 0:
+                padded[: 2 * reach] = self._get_cells(np.asarray(state), 2 * reach)
+            else:
+                padded[i + 2 * reach - 1] = state % k
+
+            if i == len(live) - 1:
+                yield padded[r : r + width].copy()
+                continue
+
+            # Past the stage, only the padding (0) can be appended
+            cells = 1 if i + 2 * reach >= width + r else k
+            for cell in reversed(range(cells)):
+                next_state = int(next_states[state, cell])
+                if results[state, cell] == stage[band + i] and live[i + 1][next_state]:
+                    stack.append((i + 1, next_state))
+
+    @hot
+    def count_jump_preimages(self, stage: NDArray, steps: int) -> int:
+        """Count the stages that evolve to the given stage in the given amount of steps"""
+        _, next_states = self._get_graph(steps)
+        live = self._get_live(stage, steps)
+
+        # Python integers, as the amount of paths can be far larger than 64 bits
+        paths = live[-1].astype(object)
+        for i in reversed(range(len(live) - 1)):
+            valid = self._get_valid(stage, steps, i)
+            paths = (valid * paths[next_states]).sum(axis=1) * live[i]
+        return int(paths.sum())
+
+    @hot
+    def _get_sizes(self, steps: int) -> Tuple[int, int, int]:
+        """Get k, the reach of a cell in the jump, and the width of its edge bands"""
+        k, r = self.ca.rule_set.k, self.ca.rule_set.r
+        return k, r * steps, r * (steps - 1)
+
+    @hot
+    def _get_cells(self, states: NDArray, width: int) -> NDArray:
+        """Get the cells of every state of the given width, left-most first, along a new axis"""
+        k = self.ca.rule_set.k
+        return (states[..., np.newaxis] // k ** np.arange(width - 1, -1, -1)) % k
+
+    @hot
+    def _get_graph(self, steps: int) -> Tuple[NDArray, NDArray]:
+        """Get the de Bruijn graph of a jump of the given amount of steps
+        A state is the last 2 * reach cells of a padded stage, as a base-k number.
+        Appending a cell to a state gives a neighbourhood, which is an index into the rule table.
+        ---
+        Returns:
+        results: NDArray
+            (states, k) array of the result of appending every cell to every state
+        next_states: NDArray
+            (states, k) array of the state after appending every cell to every state
+        """
+        if steps not in self.graphs:
+            k, reach, _ = self._get_sizes(steps)
+            table = (
+                self.ca.rule_set.rule_table
+                if steps == 1
+                else self.ca.get_composed_tables(steps)[0]
+            )
+            states = k ** (2 * reach)
+            neighbourhoods = np.arange(states * k).reshape(states, k)
+            self.graphs[steps] = (table[neighbourhoods], neighbourhoods % states)
+        return self.graphs[steps]
+
+    @hot
+    def _get_valid(self, stage: NDArray, steps: int, i: int) -> NDArray:
+        """Get the (states, k) boolean array of which cells can be appended to which states
+        at position i of the path, producing the right cell of the stage.
+        Past the stage, only the padding (0) can be appended.
+        """
+        _, reach, band = self._get_sizes(steps)
+        results, _ = self._get_graph(steps)
+        valid = results == stage[band + i]
+        if i + 2 * reach >= len(stage) + self.ca.rule_set.r:
+            valid[:, 1:] = False
+        return valid
+
+    @hot
+    def _get_live(self, stage: NDArray, steps: int) -> List[NDArray]:
+        """Get the states on any path through the graph that produces the stage
+        The first r and last r cells of the path are the padding, so they have to be 0.
+        When jumping multiple steps, the bands at the edges of the stage are not produced
+        by the composed table, so they are checked against the edge tables instead.
+        ---
+        Returns:
+        List[NDArray]
+            For every position on the path, a boolean array of the states that can be reached
+            from a valid first state, and can reach a valid last state
+        """
+        k, reach, band = self._get_sizes(steps)
+        r = self.ca.rule_set.r
+        _, next_states = self._get_graph(steps)
+        states = np.arange(len(next_states))
+        positions = len(stage) + 2 * r - 2 * reach
+
+        # The first and last states contain the padding, and the stage at the edge bands.
+        edge = k ** (2 * reach - r)
+        first = states < edge
+        last = states % k**r == 0
+        if band > 0:
+            _, left, right = self.ca.get_composed_tables(steps)
+            first &= (left[states % edge] == stage[:band]).all(axis=1)
+            last &= (right[states // k**r] == stage[-band:]).all(axis=1)
+
+        reachable = [first]
+        for i in range(positions):
+            self._check_deadline()
+            valid = self._get_valid(stage, steps, i) & reachable[-1][:, np.newaxis]
+            following = np.zeros(len(states), dtype=bool)
+            following[next_states[valid]] = True
+            reachable.append(following)
+
+        finishing = [last]
+        for i in reversed(range(positions)):
+            valid = self._get_valid(stage, steps, i)
+            finishing.append((valid & finishing[-1][next_states]).any(axis=1))
+        finishing.reverse()
+
+        return [a & b for a, b in zip(reachable, finishing)]
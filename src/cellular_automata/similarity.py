@@ -2,23 +2,51 @@ from __future__ import annotations
 
 from difflib import SequenceMatcher
 
+import numpy as np
 from nptyping import NDArray
 from beartype import beartype
-from beartype.typing import Protocol
+from beartype.typing import Dict, List, Optional, Protocol
 
-from .helpers import damerau_levenshtein, damerau_levenshtein_imported
+from .helpers import (
+    AUTOJUNK_LENGTH,
+    common_suffix_lengths,
+    damerau_levenshtein_batch,
+    get_match_masks,
+    get_symbol_index,
+    longest_match_batch,
+    matching_characters_batch,
+    hot,
+)
 
 
 class SimilarityMethod(Protocol):
     """The Bare type of a Similarity Method"""
 
-    @beartype
+    @hot
     def __call__(self, ct: NDArray, ct_prime: NDArray) -> float:
         raise NotImplementedError
 
+    @hot
+    def batch(self, ct: NDArray, ct_primes: NDArray) -> NDArray:
+        """Score every row of a 2-D array of suggested outputs against the perfect output
+        ---
+        Parameters:
+        ct: NDArray
+            The perfect output
+        ct_primes: NDArray
+            The suggested outputs, one per row
+        ---
+        Returns:
+        NDArray
+            The Similarity of every row, as float64
+        """
+        return np.asarray(
+            [self(ct, ct_prime) for ct_prime in ct_primes], dtype=np.float64
+        )
+
 
 class HammingSimilarity(SimilarityMethod):
-    @beartype
+    @hot
     def __call__(self, ct: NDArray, ct_prime: NDArray) -> float:
         """A similarity function that returns the amount of overlapping inputs
         ---
@@ -32,11 +60,16 @@ class HammingSimilarity(SimilarityMethod):
         float
             The Similarity
         """
-        return float(sum([int(x == y) for x, y in zip(ct, ct_prime)]))
+        return float(self.batch(ct, ct_prime[np.newaxis])[0])
+
+    @hot
+    def batch(self, ct: NDArray, ct_primes: NDArray) -> NDArray:
+        """The amount of overlapping inputs of every row of ct_primes"""
+        return np.count_nonzero(ct_primes == ct, axis=-1).astype(np.float64)
 
 
 class LeeSimilarity(SimilarityMethod):
-    @beartype
+    @hot
     def __call__(self, ct: NDArray, ct_prime: NDArray) -> float:
         """A similarity function that returns the amount of overlapping inputs,
         whilst respecting the integer differences
@@ -51,11 +84,26 @@ class LeeSimilarity(SimilarityMethod):
         float
             The Similarity
         """
-        return float(sum([abs(x - y) for x, y in zip(ct, ct_prime)]))
+        return float(self.batch(ct, ct_prime[np.newaxis])[0])
+
+    @hot
+    def batch(self, ct: NDArray, ct_primes: NDArray) -> NDArray:
+        """The summed integer differences of every row of ct_primes"""
+        # int64, as the differences of int8 stages could overflow
+        differences = ct_primes.astype(np.int64) - ct.astype(np.int64)
+        return np.abs(differences).sum(axis=-1).astype(np.float64)
 
 
 class DamerauLevenshteinSimilarity(SimilarityMethod):
     @beartype
+    def __init__(self) -> None:
+        """Similarity based on the Damerau Levenshtein (optimal string alignment) distance
+        The bit masks of the perfect output are remembered, as it is the same every call
+        """
+        self.target: Optional[bytes] = None
+        self.masks: Optional[NDArray] = None
+
+    @hot
     def __call__(self, ct: NDArray, ct_prime: NDArray) -> float:
         """A similarity function that returns Damerau Levenshtein Distance
         ---
@@ -69,11 +117,28 @@ class DamerauLevenshteinSimilarity(SimilarityMethod):
         float
             The Similarity
         """
-        return float(len(ct) - damerau_levenshtein_imported(ct, ct_prime))
+        return float(self.batch(ct, ct_prime[np.newaxis])[0])
+
+    @hot
+    def batch(self, ct: NDArray, ct_primes: NDArray) -> NDArray:
+        """The length of ct minus its distance to every row of ct_primes"""
+        target = ct.astype(np.int64).tobytes()
+        if target != self.target:
+            self.target, self.masks = target, get_match_masks(ct)
+        distances = damerau_levenshtein_batch(ct, ct_primes, self.masks)
+        return (len(ct) - distances).astype(np.float64)
 
 
 class LCSSimilarity(SimilarityMethod):
     @beartype
+    def __init__(self) -> None:
+        """Similarity based on the longest common substring, like difflib.SequenceMatcher
+        The symbol index of the perfect output is remembered, as it is the same every call
+        """
+        self.target: Optional[bytes] = None
+        self.index: Optional[NDArray] = None
+
+    @hot
     def __call__(self, ct: NDArray, ct_prime: NDArray) -> float:
         """A similarity function that returns the length of the longest common subsequence
         ---
@@ -87,11 +152,41 @@ class LCSSimilarity(SimilarityMethod):
         float
             The Similarity
         """
-        return float(SequenceMatcher(None, ct, ct_prime).find_longest_match().size)
+        return float(self.batch(ct, ct_prime[np.newaxis])[0])
+
+    @hot
+    def batch(self, ct: NDArray, ct_primes: NDArray) -> NDArray:
+        """The length of the longest common substring of ct and every row of ct_primes"""
+        if ct_primes.shape[-1] >= AUTOJUNK_LENGTH:
+            return np.asarray(
+                [
+                    SequenceMatcher(None, ct, ct_prime).find_longest_match().size
+                    for ct_prime in ct_primes
+                ],
+                dtype=np.float64,
+            )
+
+        return longest_match_batch(ct, ct_primes, self.get_index(ct)).astype(np.float64)
+
+    @hot
+    def get_index(self, ct: NDArray) -> NDArray:
+        """Get the symbol index of the perfect output, building it if it changed"""
+        target = ct.astype(np.int64).tobytes()
+        if target != self.target:
+            self.target, self.index = target, get_symbol_index(ct)
+        return self.index
 
 
 class GestaltSimilarity(SimilarityMethod):
     @beartype
+    def __init__(self) -> None:
+        """Similarity based on the Ratcliff/Obershelp ratio, like difflib.SequenceMatcher
+        The symbol index of the perfect output is remembered, as it is the same every call
+        """
+        self.target: Optional[bytes] = None
+        self.index: Optional[NDArray] = None
+
+    @hot
     def __call__(self, ct: NDArray, ct_prime: NDArray) -> float:
         """A similarity function that returns the Gestalt Similarity
         ---
@@ -105,4 +200,153 @@ class GestaltSimilarity(SimilarityMethod):
         float
             The Similarity
         """
-        return float(2* len(ct) * SequenceMatcher(None, ct, ct_prime).ratio())
+        return float(self.batch(ct, ct_prime[np.newaxis])[0])
+
+    @hot
+    def batch(self, ct: NDArray, ct_primes: NDArray) -> NDArray:
+        """The Gestalt Similarity of ct and every row of ct_primes"""
+        if ct_primes.shape[-1] >= AUTOJUNK_LENGTH:
+            return np.asarray(
+                [
+                    2 * len(ct) * SequenceMatcher(None, ct, ct_prime).ratio()
+                    for ct_prime in ct_primes
+                ],
+                dtype=np.float64,
+            )
+
+        matches = matching_characters_batch(ct, ct_primes, self.get_index(ct))
+        return self.from_matches(ct, ct_primes, matches)
+
+    @hot
+    def get_index(self, ct: NDArray) -> NDArray:
+        """Get the symbol index of the perfect output, building it if it changed"""
+        target = ct.astype(np.int64).tobytes()
+        if target != self.target:
+            self.target, self.index = target, get_symbol_index(ct)
+        return self.index
+
+    @hot
+    @staticmethod
+    def from_matches(ct: NDArray, ct_primes: NDArray, matches: NDArray) -> NDArray:
+        """Get the Gestalt Similarity from the amount of matching characters of every row"""
+        # The same operations as SequenceMatcher.ratio, to get the same floats
+        length = len(ct) + ct_primes.shape[-1]
+        ratio = 2.0 * matches / length if length else np.ones(len(ct_primes))
+        return 2 * len(ct) * ratio
+
+
+class CompositeSimilarity(SimilarityMethod):
+    @beartype
+    def __init__(self, primary: SimilarityMethod, *secondary: SimilarityMethod) -> None:
+        """Computes several similarity methods in one pass, sharing their intermediates
+        The primary method is the similarity, the results of all methods of the last call
+        are kept in last_metrics, by class name, for logging.
+        After collect_metrics, the results of every call are kept until take_metrics.
+        Hamming and Lee share the differences of the cells, LCS and Gestalt share the
+        common substring lengths.
+
+        ---
+        Parameters:
+        primary: SimilarityMethod
+            The method whose result is returned
+        secondary: SimilarityMethod
+            The methods that are only computed for last_metrics
+        """
+        self.primary = type(primary).__name__
+        self.methods: Dict[str, SimilarityMethod] = {self.primary: primary}
+        for method in secondary:
+            name = type(method).__name__
+            if name in self.methods:
+                raise ValueError(f"{name} is used more than once")
+            self.methods[name] = method
+        self.last_metrics: Dict[str, NDArray] = {}
+        self.collected: Optional[Dict[str, List[NDArray]]] = None
+
+    @beartype
+    def collect_metrics(self, collect: bool = True) -> None:
+        """Start keeping the results of every call until they are taken, or stop it
+        ---
+        Parameters:
+        collect: bool
+            Whether to keep the results of every call from now on"""
+        self.collected = {name: [] for name in self.methods} if collect else None
+
+    @beartype
+    def take_metrics(self) -> Dict[str, NDArray]:
+        """Get the results of all methods since the last take, and forget them
+        ---
+        Returns:
+        Dict[str, NDArray]
+            The results of every scored row by class name, empty if not collecting"""
+        if self.collected is None:
+            return {}
+        metrics = {
+            name: np.concatenate(parts) if parts else np.empty(0)
+            for name, parts in self.collected.items()
+        }
+        self.collect_metrics()
+        return metrics
+
+    @hot
+    def __call__(self, ct: NDArray, ct_prime: NDArray) -> float:
+        """A similarity function that returns the similarity of the primary method
+        ---
+        Parameters:
+        ct: NDArray
+            The perfect output
+        ct_prime: NDArray
+            The suggested output
+        ---
+        Returns:
+        float
+            The Similarity
+        """
+        return float(self.batch(ct, ct_prime[np.newaxis])[0])
+
+    @hot
+    def batch(self, ct: NDArray, ct_primes: NDArray) -> NDArray:
+        """The similarity of the primary method of every row of ct_primes"""
+        shared: Dict[str, NDArray] = {}
+        self.last_metrics = {
+            name: self._score(method, ct, ct_primes, shared)
+            for name, method in self.methods.items()
+        }
+        if self.collected is not None:
+            for name, scores in self.last_metrics.items():
+                self.collected[name].append(scores)
+        return self.last_metrics[self.primary]
+
+    @hot
+    def _score(
+        self,
+        method: SimilarityMethod,
+        ct: NDArray,
+        ct_primes: NDArray,
+        shared: Dict[str, NDArray],
+    ) -> NDArray:
+        """Score with one of the methods, reusing and filling the shared intermediates"""
+        # issubclass, as isinstance checks against protocols are structural:
+        # every similarity method would be an instance of every other one
+        kind = type(method)
+        if issubclass(kind, (HammingSimilarity, LeeSimilarity)):
+            if "differences" not in shared:
+                shared["differences"] = ct_primes.astype(np.int64) - ct.astype(np.int64)
+            differences = shared["differences"]
+            if issubclass(kind, HammingSimilarity):
+                overlapping = np.count_nonzero(differences == 0, axis=-1)
+                return overlapping.astype(np.float64)
+            return np.abs(differences).sum(axis=-1).astype(np.float64)
+
+        native = ct_primes.shape[-1] < AUTOJUNK_LENGTH
+        if native and issubclass(kind, (LCSSimilarity, GestaltSimilarity)):
+            index = method.get_index(ct)
+            if "lengths" not in shared:
+                shared["lengths"] = common_suffix_lengths(ct, ct_primes, index)
+            lengths = shared["lengths"]
+            if issubclass(kind, LCSSimilarity):
+                longest = longest_match_batch(ct, ct_primes, index, lengths)
+                return longest.astype(np.float64)
+            matches = matching_characters_batch(ct, ct_primes, index, lengths)
+            return method.from_matches(ct, ct_primes, matches)
+
+        return method.batch(ct, ct_primes)
@@ -6,6 +6,8 @@ import numpy as np
 from nptyping import NDArray
 from beartype import beartype
 
+from .helpers import hot
+
 
 class StageRenderer:
     characters = [
@@ -16,7 +18,7 @@ class StageRenderer:
         "▓",
     ]
 
-    @beartype
+    @hot
     @classmethod
     def render_item(cls, item: np.int8) -> str:
         """Returns a shaded unicode full block for an item"""
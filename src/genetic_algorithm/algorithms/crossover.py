@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import math
-import random
 
 import numpy as np
 from nptyping import NDArray
 from beartype import beartype
-from beartype.typing import List, Callable, Iterator, Protocol
+from beartype.typing import List, Callable, Iterator, Optional, Protocol
 
-from genetic_algorithm.helpers import take_random_individual
+from cellular_automata.helpers import hot
+from genetic_algorithm.helpers import get_random_groups
 
 
 class CrossoverAlgorithm(Protocol):
@@ -18,18 +18,44 @@ class CrossoverAlgorithm(Protocol):
     def __init__(*args, **kwargs) -> None:
         raise NotImplementedError
 
-    @beartype
-    def __call__(self, population: NDArray) -> NDArray:
+    @hot
+    def __call__(self, population: NDArray, out: Optional[NDArray] = None) -> NDArray:
         raise NotImplementedError
 
+    @hot
+    def get_amount_of_children(self, population_size: int) -> int:
+        raise NotImplementedError
 
-class Swap:
     @beartype
+    def set_rng(self, rng: np.random.Generator) -> None:
+        """Draw from the given generator from now on"""
+        self.rng = rng
+
+
+@hot
+def _get_children_buffer(
+    population: NDArray, groups: NDArray, out: Optional[NDArray]
+) -> NDArray:
+    """Gets the rows of out to write the children of the groups to, or a new array"""
+    shape = (groups.size, population.shape[1])
+    if out is None:
+        return np.empty(shape, dtype=population.dtype)
+    if len(out) < shape[0] or out.shape[1:] != shape[1:]:
+        raise ValueError(f"The output buffer should hold at least {shape} children")
+    return out[: shape[0]]
+
+
+class Swap:
+    @hot
     @staticmethod
-    def random(part: NDArray, i: int = 0) -> NDArray:
+    def random(
+        part: NDArray, i: int = 0, rng: Optional[np.random.Generator] = None
+    ) -> NDArray:
         """Random Swap funcion
         This function can be used in the crossover algorithms to swap parts' places
         It returns the parts in random order
+        The crossover algorithms draw the orders of all parts at once from their own
+        generator instead of calling this function
 
         ---
         Parameters:
@@ -37,16 +63,20 @@ class Swap:
             Numpy array representing the part
         i: int
             Index at which the part is (not used by this function)
+        rng: Optional[np.random.Generator]
+            The generator to draw the order from, a new unseeded one if None
 
         ---
         Returns:
         NDArray representing the new swapped parts.
         """
-        return np.random.permutation(part)
+        return (np.random.default_rng() if rng is None else rng).permutation(part)
 
-    @beartype
+    @hot
     @staticmethod
-    def roll(part: NDArray, i: int = 0) -> NDArray:
+    def roll(
+        part: NDArray, i: int = 0, rng: Optional[np.random.Generator] = None
+    ) -> NDArray:
         """Rolling Swap funcion
         This function can be used in the crossover algorithms to swap parts' places
         It returns the parts in rolled order, based on the provided index
@@ -58,6 +88,8 @@ class Swap:
             Numpy array representing the part
         i: int
             Index at which the part is
+        rng: Optional[np.random.Generator]
+            Not used by this function, which draws nothing
 
         ---
         Returns:
@@ -74,6 +106,7 @@ class UniformCrossover(CrossoverAlgorithm):
         amount_of_parents: int = 2,
         offspring_rate: float = 1.0,
         swap_function: Callable = Swap.roll,
+        rng: Optional[np.random.Generator] = None,
     ) -> None:
         """A uniform recombination algorithm
 
@@ -83,27 +116,32 @@ class UniformCrossover(CrossoverAlgorithm):
             The amount of parents per pool of recombination
         offspring_rate: float (>1)
             The ratio of offsprings per parent
+        swap_function:
+            The function to be used for swapping out (from the recombination.Swap class)
+        rng: Optional[np.random.Generator]
+            The generator to draw from, a new unseeded one if None
         """
         self.amount_of_parents = amount_of_parents
         self.offspring_rate = offspring_rate
         self.swap = swap_function
+        self.rng = np.random.default_rng() if rng is None else rng
 
-    @beartype
-    def __call__(self, population: NDArray) -> NDArray:
+    @hot
+    def __call__(self, population: NDArray, out: Optional[NDArray] = None) -> NDArray:
         """Uniform recombination algorithm on population
 
         ---
         Parameters:
         population: NDArray
             Array representing the population
+        out: Optional[NDArray]
+            Array to write the offspring to, with at least get_amount_of_children rows
 
         ---
         Returns:
-        NDArray representing the offspring
+        NDArray representing the offspring, a view of out if it is given
         """
-        amount_of_groups = math.ceil(
-            (population.shape[0] / self.amount_of_parents) * self.offspring_rate
-        )
+        amount_of_groups = self.get_amount_of_groups(population.shape[0])
 
         if population.shape[0] > amount_of_groups * self.amount_of_parents:
             raise ValueError("Effective reproduction rate should be at least 1")
@@ -111,44 +149,114 @@ class UniformCrossover(CrossoverAlgorithm):
         if self.amount_of_parents > population.shape[0]:
             raise ValueError("Amount of parents must be smaller than population size")
 
-        children_groups = self._get_uniform_children(
-            population=population,
+        groups = get_random_groups(
+            len(population),
             amount_of_groups=amount_of_groups,
-            amount_per_group=self.amount_of_parents,
+            amount=self.amount_of_parents,
+            rng=self.rng,
         )
-        return np.vstack(list(children_groups))
+        children = _get_children_buffer(population, groups, out)
+        if self.swap is Swap.roll:
+            # Rolling a single column by the default index of 0 leaves it in place
+            return np.take(population, groups.ravel(), axis=0, out=children)
+        if self.swap is Swap.random:
+            return self._get_uniform_random_children(
+                population=population, groups=groups, out=children
+            )
 
-    @beartype
+        children_groups = self._get_uniform_children(
+            population=population, groups=groups
+        )
+        children[...] = np.vstack(list(children_groups))
+        return children
+
+    @hot
+    def get_amount_of_groups(self, population_size: int) -> int:
+        """Gets the amount of groups of parents to recombine
+
+        ---
+        Parameters:
+        population_size: int
+            The amount of individuals in the population
+
+        ---
+        Returns:
+        int, the amount of groups
+        """
+        return math.ceil(
+            (population_size / self.amount_of_parents) * self.offspring_rate
+        )
+
+    @hot
+    def get_amount_of_children(self, population_size: int) -> int:
+        """Gets the amount of offspring of a population, to size the output buffer"""
+        return self.get_amount_of_groups(population_size) * self.amount_of_parents
+
+    @hot
+    def _get_uniform_random_children(
+        self, *, population: NDArray, groups: NDArray, out: NDArray
+    ) -> NDArray:
+        """Get uniformly-crossed-over children from population, for Swap.random
+        The rows of every swapped column of every group are permuted at once
+
+        ---
+        Parameters:
+        population: NDArray
+            Numpy array representing the population to make children from
+        groups: NDArray
+            (amount_of_groups, amount_per_group) array of the indices of the parents
+        out: NDArray
+            Array to write the offspring to, group after group
+
+        ---
+        Returns:
+        NDArray representing the offspring, which is out
+        """
+        amount_of_groups, amount_per_group = groups.shape
+        dimensions = population.shape[1]
+        swapped = self.rng.random((amount_of_groups, dimensions)) < 0.5
+        keys = self.rng.random((amount_of_groups, dimensions, amount_per_group))
+        permutations = np.where(
+            swapped[..., np.newaxis],
+            np.argsort(keys, axis=-1),
+            np.arange(amount_per_group),
+        )
+        # The parent of child j at column i of a group is at [group, j, i]
+        sources = np.take_along_axis(
+            groups[:, :, np.newaxis], permutations.transpose(0, 2, 1), axis=1
+        )
+        out.reshape(sources.shape)[...] = population[sources, np.arange(dimensions)]
+        return out
+
+    @hot
     def _get_uniform_children(
-        self, *, population: NDArray, amount_of_groups: int, amount_per_group: int
+        self, *, population: NDArray, groups: NDArray
     ) -> Iterator[NDArray]:
-        """Get uniformly-crossed-over children from population
+        """Get uniformly-crossed-over children from population, for any swap function
 
         ---
         Parameters:
         population: NDArray
             Numpy array representing the population to make children from
-        amount_of_groups: int
-            The amount of child groups to make
-        amount_per_group: int
-            The amount of individuals (parents & children) per crossed-over group
+        groups: NDArray
+            (amount_of_groups, amount_per_group) array of the indices of the parents
 
         ---
         Returns:
         Itterator over the generated child groups
         """
-        for _ in range(amount_of_groups):
-            parents = take_random_individual(population, amount=amount_per_group)
-            chances = np.random.rand(parents.shape[1])
+        for group in groups:
+            parents = population[group]
+            chances = self.rng.random(parents.shape[1])
             yield self._get_uniform_child_group(parents=parents, chances=chances)
 
-    @beartype
+    @hot
     def _get_uniform_child_group(
         self, *, parents: NDArray, chances: NDArray
     ) -> NDArray:
         """Get Uniformly-crossed-over child group from population
         Each part will be swapped/randomised according to self.swap
-        NOTE: This algorithm is slow, and can do with improving
+        NOTE: This algorithm is slow, it is only used for custom swap functions
 
         ---
         Parameters:
@@ -181,6 +289,7 @@ class PointCrossover(CrossoverAlgorithm):
         amount_of_splits: int = 1,
         offspring_rate: float = 1.0,
         swap_function: Callable = Swap.roll,
+        rng: Optional[np.random.Generator] = None,
     ) -> None:
         """A uniform recombination algorithm
 
@@ -194,28 +303,31 @@ class PointCrossover(CrossoverAlgorithm):
             The ratio of offsprings per parent
         swap_function:
             The function to be used for swapping out (from the recombination.Swap class)
+        rng: Optional[np.random.Generator]
+            The generator to draw from, a new unseeded one if None
         """
         self.amount_of_parents = amount_of_parents
         self.offspring_rate = offspring_rate
         self.amount_of_splits = amount_of_splits
         self.swap = swap_function
+        self.rng = np.random.default_rng() if rng is None else rng
 
-    @beartype
-    def __call__(self, population: NDArray) -> NDArray:
+    @hot
+    def __call__(self, population: NDArray, out: Optional[NDArray] = None) -> NDArray:
         """Point recombination algorithm on population
 
         ---
         Parameters:
         population: NDArray
             Array representing the population
+        out: Optional[NDArray]
+            Array to write the offspring to, with at least get_amount_of_children rows
 
         ---
         Returns:
-        NDArray representing the offspring
+        NDArray representing the offspring, a view of out if it is given
         """
-        amount_of_groups = math.ceil(
-            (population.shape[0] / self.amount_of_parents) * self.offspring_rate
-        )
+        amount_of_groups = self.get_amount_of_groups(population.shape[0])
 
         if population.shape[0] > amount_of_groups * self.amount_of_parents:
             raise ValueError("Effective reproduction rate should be at least 1")
@@ -228,43 +340,128 @@ class PointCrossover(CrossoverAlgorithm):
                 "Amount of splits has to be smaller than the dimensions of the individuals"
             )
 
-        children_groups = self._get_point_children(
-            population=population,
+        groups = get_random_groups(
+            len(population),
             amount_of_groups=amount_of_groups,
-            amount_per_group=self.amount_of_parents,
+            amount=self.amount_of_parents,
+            rng=self.rng,
         )
-        return np.vstack(list(children_groups))
+        children = _get_children_buffer(population, groups, out)
+        if self.swap is Swap.roll or self.swap is Swap.random:
+            return self._get_point_children_batch(
+                population=population, groups=groups, out=children
+            )
 
-    @beartype
+        children_groups = self._get_point_children(population=population, groups=groups)
+        children[...] = np.vstack(list(children_groups))
+        return children
+
+    @hot
+    def get_amount_of_groups(self, population_size: int) -> int:
+        """Gets the amount of groups of parents to recombine
+
+        ---
+        Parameters:
+        population_size: int
+            The amount of individuals in the population
+
+        ---
+        Returns:
+        int, the amount of groups
+        """
+        return math.ceil(
+            (population_size / self.amount_of_parents) * self.offspring_rate
+        )
+
+    @hot
+    def get_amount_of_children(self, population_size: int) -> int:
+        """Gets the amount of offspring of a population, to size the output buffer"""
+        return self.get_amount_of_groups(population_size) * self.amount_of_parents
+
+    @hot
+    def _get_point_children_batch(
+        self, *, population: NDArray, groups: NDArray, out: NDArray
+    ) -> NDArray:
+        """Get point-crossed-over children from population, for Swap.roll and Swap.random
+        The splits of all groups are drawn at once, and the children are taken from the
+        parents of their group at every column
+
+        ---
+        Parameters:
+        population: NDArray
+            Numpy array representing the population to make children from
+        groups: NDArray
+            (amount_of_groups, amount_per_group) array of the indices of the parents
+        out: NDArray
+            Array to write the offspring to, group after group
+
+        ---
+        Returns:
+        NDArray representing the offspring, which is out
+        """
+        amount_of_groups, amount_per_group = groups.shape
+        dimensions = population.shape[1]
+        splits = get_random_groups(
+            dimensions - 1,
+            amount_of_groups=amount_of_groups,
+            amount=self.amount_of_splits,
+            rng=self.rng,
+        )
+        # The part every column of every group is in
+        part_type = np.min_scalar_type(self.amount_of_splits)
+        marks = np.zeros((amount_of_groups, dimensions), dtype=part_type)
+        marks[np.arange(amount_of_groups)[:, np.newaxis], splits + 1] = 1
+        parts = np.cumsum(marks, axis=1, dtype=part_type)[:, np.newaxis, :]
+        parents = population[groups]
+        children = out.reshape(parents.shape)
+
+        if self.swap is Swap.roll:
+            # Part i of the group is rolled by i, which only depends on i % parents
+            shifts = parts % amount_per_group
+            children[...] = parents
+            for shift in range(1, amount_per_group):
+                rolled = np.roll(parents, shift, axis=1)
+                np.copyto(children, rolled, where=shifts == shift)
+        else:
+            # The position in the group of the parent of child j in part i is at [g, j, i]
+            keys = self.rng.random(
+                (amount_of_groups, self.amount_of_splits + 1, amount_per_group)
+            )
+            permutations = np.argsort(keys, axis=-1).transpose(0, 2, 1)
+            positions = np.take_along_axis(
+                permutations, np.broadcast_to(parts, parents.shape), axis=2
+            )
+            children[...] = np.take_along_axis(parents, positions, axis=1)
+
+        return out
+
+    @hot
     def _get_point_children(
         self,
         *,
         population: NDArray,
-        amount_of_groups: int,
-        amount_per_group: int,
+        groups: NDArray,
     ) -> Iterator[NDArray]:
-        """Get point-crossed-over children from population
+        """Get point-crossed-over children from population, for any swap function
 
         ---
         Parameters:
         population: NDArray
             Numpy array representing the population to make children from
-        amount_of_groups: int
-            The amount of child groups to make
-        amount_per_group: int
-            The amount of individuals (parents & children) per crossed-over group
+        groups: NDArray
+            (amount_of_groups, amount_per_group) array of the indices of the parents
 
         ---
         Returns:
         Itterator over the generated child groups
         """
-        for _ in range(amount_of_groups):
-            parents = take_random_individual(population, amount=amount_per_group)
+        for group in groups:
+            parents = population[group]
             splits = self._get_random_ranges(dimensions=parents.shape[1])
             parts = list(self._get_split_parts(splits, parents))
             yield np.hstack(parts)
 
-    @beartype
+    @hot
     def _get_random_ranges(self, *, dimensions: int) -> List[int]:
         """Get a list of integers representing the ranges for splitting an individual
 
@@ -281,11 +478,12 @@ class PointCrossover(CrossoverAlgorithm):
             Example: for one split at index 6 for 10 dimensions, the returned value would be [0,6,10]
             representing range [0:6] and [6:10]
         """
-        return sorted(
-            random.sample(range(1, dimensions), self.amount_of_splits) + [0, dimensions]
+        splits = self.rng.choice(
+            np.arange(1, dimensions), self.amount_of_splits, replace=False
         )
+        return sorted(splits.tolist() + [0, dimensions])
 
-    @beartype
+    @hot
     def _get_split_parts(
         self, splits: List[int], parents: NDArray
     ) -> Iterator[NDArray]:
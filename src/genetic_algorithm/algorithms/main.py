@@ -3,10 +3,15 @@ from __future__ import annotations
 import numpy as np
 from nptyping import NDArray
 from beartype import beartype
-from beartype.typing import Optional
+from beartype.typing import Callable, Optional, Sequence
 
+from cellular_automata.helpers import hot
 from cellular_automata import AutomataObjectiveFunction
-from genetic_algorithm.helpers import generate_rand_population
+from genetic_algorithm.helpers import (
+    GenerationCallback,
+    Instrumentation,
+    generate_rand_population,
+)
 from .crossover import CrossoverAlgorithm
 from .mutation import MutationAlgorithm
 from .selection import SelectionAlgorithm
@@ -24,6 +29,10 @@ class GeneticAlgorithm:
         mutation_algorithm: MutationAlgorithm,
         selection_algorithm: SelectionAlgorithm,
         objective_function: Optional[AutomataObjectiveFunction] = None,
+        batch_evaluation: bool = False,
+        evaluator: Optional[Callable] = None,
+        rng: Optional[np.random.Generator] = None,
+        callbacks: Sequence[GenerationCallback] = (),
     ) -> None:
         """Construct a new GA object.
 
@@ -39,7 +48,27 @@ class GeneticAlgorithm:
             The mutation algorithm to use
         selection-algorithm: Callable
             The selection algorithm to use
+        objective_function: Optional[AutomataObjectiveFunction]
+            The objective function the problem wraps, if any
+        batch_evaluation: bool
+            Whether to score each generation with one call to the batch function of the
+            objective function, instead of simulating every child on its own.
+            The children are still passed to the problem, so its state and logger are exact.
+        evaluator: Optional[Callable]
+            Scores a whole generation in place of the batch function, like a ParallelEvaluator.
+            Setting it implies batch evaluation.
+        rng: Optional[np.random.Generator]
+            If set, the generator that the GA and all its algorithms draw from.
+            Otherwise, the GA draws from a new unseeded generator, and the algorithms
+            from their own.
+        callbacks: Sequence[GenerationCallback]
+            Called with a GenerationRecord after every generation, like a JsonLinesSink.
+            Without callbacks, the statistics of the generations are not computed.
         """
+        if (batch_evaluation or evaluator is not None) and objective_function is None:
+            raise ValueError(
+                "Batch evaluation needs the objective function of the problem"
+            )
 
         self.pop_size = pop_size
         self.greedy = greedy
@@ -48,6 +77,29 @@ class GeneticAlgorithm:
         self.mutate = mutation_algorithm
         self.select = selection_algorithm
         self.objective_function = objective_function
+        self.batch_function = evaluator
+        if evaluator is None and batch_evaluation:
+            self.batch_function = objective_function.get_batch_function()
+
+        self.callbacks = callbacks
+        self.rng = np.random.default_rng()
+        if rng is not None:
+            self.set_rng(rng)
+
+    @beartype
+    def set_rng(self, rng: np.random.Generator) -> None:
+        """Let the GA and all its algorithms draw from the given generator, so a run is
+        reproducible from the seed of that generator alone
+
+        ---
+        Parameters:
+        rng: np.random.Generator
+            The generator to draw from, like np.random.default_rng(seed)
+        """
+        self.rng = rng
+        self.crossover.set_rng(rng)
+        self.mutate.set_rng(rng)
+        self.select.set_rng(rng)
 
     @beartype
     def __call__(
@@ -61,27 +113,77 @@ class GeneticAlgorithm:
             An integer problem, from the ioh package. This version of the GA
             should only work on binary/discrete search spaces.
         budget: int
-            The amount of times the GA is allowed to call the problem
+            The amount of times the GA is allowed to call the problem.
+            The GA never spends more: the last generation is cut short to exactly use
+            up the budget, and the GA stops right after it, without selecting from it.
+
+        Every generation is written to the same buffers, which are allocated once:
+        the population, with a row for the current best if greedy, the children,
+        their mutations and their scores. As the mutations are written to their own
+        buffer, the children are selected as they were before mutation, with any
+        mutation algorithm, whether it works in place or not.
+        The time of every phase of a generation is handed to the callbacks.
         """
+        dimensions = problem.meta_data.n_variables
+        population_buffer = np.empty(
+            (self.pop_size + int(self.greedy), dimensions), dtype=np.int8
+        )
+        children_buffer = np.empty(
+            (self.crossover.get_amount_of_children(len(population_buffer)), dimensions),
+            dtype=np.int8,
+        )
+        mutated_buffer = np.empty_like(children_buffer)
+        scores_buffer = np.empty(len(children_buffer), dtype=np.float64)
 
-        population = generate_rand_population(
+        population = population_buffer[: self.pop_size]
+        population[...] = generate_rand_population(
             pop_size=self.pop_size,
-            dimensions=problem.meta_data.n_variables,
+            dimensions=dimensions,
             lb=int(problem.bounds.lb.min()),
             ub=int(problem.bounds.ub.max()),
+            rng=self.rng,
         )
 
-        while self.should_continue(problem, budget):
-            children = self.crossover(population)
-            mutated_children = self.mutate(children)
-            scores = self.evaluate(mutated_children, problem)
-            population = self.select(children, scores, self.pop_size)
-            if self.greedy:
-                population = self.keep_current_best(population, problem)
-
+        instrumentation = Instrumentation(self.callbacks, self.objective_function)
+        # The similarity stops collecting metrics, even if a generation raises
+        try:
+            while self.should_continue(problem, budget):
+                instrumentation.start_generation()
+                children = self.crossover(population, out=children_buffer)
+                instrumentation.lap("crossover")
+                children = children[: budget - problem.state.evaluations]
+                mutated_children = self.mutate(
+                    children, out=mutated_buffer[: len(children)]
+                )
+                instrumentation.lap("mutation")
+                scores = self.evaluate(mutated_children, problem, out=scores_buffer)
+                instrumentation.lap("evaluation")
+                if problem.state.evaluations >= budget:
+                    # Its selection would never be evaluated, and a generation that
+                    # was cut short can be too small to select from
+                    instrumentation.end_generation(mutated_children, scores, problem)
+                    break
+                # The children are selected as they were before the mutation, which
+                # wrote to its own buffer, by the scores of their mutations.
+                # The current best goes in front of the selected children
+                selected = self.select(
+                    children,
+                    scores,
+                    min(self.pop_size, len(children)),
+                    out=population_buffer[int(self.greedy) :],
+                )
+                population = population_buffer[: int(self.greedy) + len(selected)]
+                if self.greedy:
+                    population = self.keep_current_best(
+                        selected, problem, out=population
+                    )
+                instrumentation.lap("selection")
+                instrumentation.end_generation(mutated_children, scores, problem)
+        finally:
+            instrumentation.finish()
         return problem.state.current_best
 
-    @beartype
+    @hot
     def should_continue(self, problem: ioh.problem.Integer, budget: int) -> bool:
         """Whether the algorithm should continue one more generation or not
 
@@ -102,9 +204,13 @@ class GeneticAlgorithm:
                 and not self.objective_function.is_optimal(problem.state.current_best.x)
             )
 
-    @beartype
-    @staticmethod
-    def evaluate(population: NDArray, problem: ioh.problem.Integer) -> NDArray:
+    @hot
+    def evaluate(
+        self,
+        population: NDArray,
+        problem: ioh.problem.Integer,
+        out: Optional[NDArray] = None,
+    ) -> NDArray:
         """Maps the problem on the population, returning a static list of scores
 
         ---
@@ -113,16 +219,29 @@ class GeneticAlgorithm:
             The population to evaluate
         problem: ioh.problem.Integer
             The problem to evaluate the population on
+        out: Optional[NDArray]
+            Array to write the scores to, with at least one element per individual
 
         ---
         Returns:
         NDArray of the scores of each individual, alligned by index
         """
-        return np.asarray([problem(individual) for individual in population])
+        if self.batch_function is not None:
+            self.objective_function.prefetch(
+                population, self.batch_function(population)
+            )
+        scores = np.empty(len(population)) if out is None else out[: len(population)]
+        for index, individual in enumerate(population):
+            scores[index] = problem(individual)
+        return scores
 
-    @beartype
+    @hot
     @staticmethod
-    def keep_current_best(population: NDArray, problem: ioh.problem.Integer) -> NDArray:
+    def keep_current_best(
+        population: NDArray,
+        problem: ioh.problem.Integer,
+        out: Optional[NDArray] = None,
+    ) -> NDArray:
         """Appends the current best to the population for the next round
 
         ---
@@ -131,9 +250,17 @@ class GeneticAlgorithm:
             The population to append the current best to
         problem: ioh.problem.Integer
             The problem to find the current best from
+        out: Optional[NDArray]
+            Array of one more row than the population to write the new population to.
+            The population can already be in its last rows, then it is not copied.
 
         ---
         Returns:
         NDArray representing the new population
         """
-        return np.vstack([[problem.state.current_best.x], population])
+        if out is None:
+            return np.vstack([[problem.state.current_best.x], population])
+        out[0] = problem.state.current_best.x
+        if out[1:].ctypes.data != population.ctypes.data:
+            out[1:] = population
+        return out
@@ -1,12 +1,35 @@
 from __future__ import annotations
 
-import random
-
 import numpy as np
-from functools import reduce
 from nptyping import NDArray
 from beartype import beartype
-from beartype.typing import List, Optional, Protocol
+from beartype.typing import Optional, Protocol, Tuple
+
+from cellular_automata.helpers import hot
+
+
+@hot
+def _get_output(population: NDArray, out: Optional[NDArray]) -> NDArray:
+    """Gets the array to mutate: out with the population copied in, or the population"""
+    if out is None or out is population:
+        return population
+    out[...] = population
+    return out
+
+
+@hot
+def _get_distinct_pairs(
+    dimensions: int, amount: int, rng: np.random.Generator
+) -> Tuple[NDArray, NDArray]:
+    """Draw amount pairs of distinct positions, uniformly like
+    rng.choice(dimensions, size=2, replace=False)"""
+    if dimensions < 2:
+        raise ValueError("Two distinct positions need at least two dimensions")
+    first = rng.integers(dimensions, size=amount)
+    second = rng.integers(dimensions - 1, size=amount)
+    # Skip over the first position, so the second is uniform over the others
+    second += second >= first
+    return first, second
 
 
 class MutationAlgorithm(Protocol):
@@ -16,20 +39,37 @@ class MutationAlgorithm(Protocol):
     def __init__(self, *args, **kwargs) -> None:
         raise NotImplementedError
 
-    @beartype
-    def __call__(self, population: NDArray) -> NDArray:
+    @hot
+    def __call__(self, population: NDArray, out: Optional[NDArray] = None) -> NDArray:
         raise NotImplementedError
 
+    @beartype
+    def set_rng(self, rng: np.random.Generator) -> None:
+        """Draw from the given generator from now on"""
+        self.rng = rng
+
 
 class BitflipMutation(MutationAlgorithm):
+    # Below this chance per gene, the genes to flip are found by skipping over the
+    # others with geometric draws, instead of drawing a chance for every gene
+    SPARSE_CHANCE = 1 / 64
+
     @beartype
-    def __init__(self, rate: float, lb: int = 0, ub: int = 1) -> None:
+    def __init__(
+        self,
+        rate: float,
+        lb: int = 0,
+        ub: int = 1,
+        rng: Optional[np.random.Generator] = None,
+    ) -> None:
         """A uniform mutation algorithm
 
         ---
         Parameters:
         rate: float [0:1]
             The rate at which to randomly mutate any bit
+        rng: Optional[np.random.Generator]
+            The generator to draw from, a new unseeded one if None
         """
         self.rate = rate / (
             # Correct for randomly guessing the same value.
@@ -37,34 +77,80 @@ class BitflipMutation(MutationAlgorithm):
         )
         self.lb = lb
         self.ub = ub
+        self.rng = np.random.default_rng() if rng is None else rng
 
-    @beartype
-    def __call__(self, population: NDArray) -> NDArray:
+    @hot
+    def __call__(self, population: NDArray, out: Optional[NDArray] = None) -> NDArray:
         """Uniform mutation algorithm on population
+        The population is left as it is: the offspring is written to a copy, or to the
+        output buffer if it is given
 
         ---
         Parameters:
         population: NDArray
             Array representing the population
+        out: Optional[NDArray]
+            Array of the same shape to write the offspring to, instead of a copy
 
         ---
         Returns:
         NDArray representing the offspring
         """
-        # Numpy doesn't have map().
-        # Instead, you define a function, vecotise it, and then apply it on the array.
+        out = population.copy() if out is None else _get_output(population, out)
         chance = self.rate / population.shape[1]
-        flip_bits = np.vectorize(
-            lambda x: x
-            if (random.random() > chance)
-            else np.random.randint(low=self.lb, high=self.ub + 1, dtype=np.int8)
+        if chance < self.SPARSE_CHANCE:
+            positions = self._get_sparse_positions(population.size, chance, self.rng)
+        else:
+            positions = np.flatnonzero(self.rng.random(population.size) < chance)
+
+        out.flat[positions] = self.rng.integers(
+            self.lb, self.ub + 1, size=len(positions), dtype=np.int8
         )
-        return flip_bits(population)
+        return out
+
+    @hot
+    @staticmethod
+    def _get_sparse_positions(
+        size: int, chance: float, rng: np.random.Generator
+    ) -> NDArray:
+        """Gets the flat positions to flip, by drawing the gaps between them
+
+        ---
+        Parameters:
+        size: int
+            The amount of genes in the population
+        chance: float
+            The chance to flip any gene
+        rng: np.random.Generator
+            The generator to draw the gaps from
+
+        ---
+        Returns:
+        NDArray of the sorted positions, each one being flipped with the given chance
+        """
+        if chance <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        blocks = []
+        last = -1
+        while last < size:
+            # Draw a bit more gaps than expected, so one block is nearly always enough
+            expected = (size - last) * chance
+            amount = int(expected + 4 * np.sqrt(expected)) + 1
+            positions = last + np.cumsum(rng.geometric(chance, size=amount))
+            blocks.append(positions[positions < size])
+            last = int(positions[-1])
+        return np.concatenate(blocks)
 
 
 class InsertionMutation(MutationAlgorithm):
     @beartype
-    def __init__(self, rate: float = 1.0, multiple_values: bool = False) -> None:
+    def __init__(
+        self,
+        rate: float = 1.0,
+        multiple_values: bool = False,
+        rng: Optional[np.random.Generator] = None,
+    ) -> None:
         """An insertion mutation algorithm
 
         ---
@@ -73,144 +159,195 @@ class InsertionMutation(MutationAlgorithm):
             The rate at which to randomly mutate any individual
         multiple_values: bool
             If set to false, one value will be moved at a time. If true, groups are moved.
+        rng: Optional[np.random.Generator]
+            The generator to draw from, a new unseeded one if None
         """
         self.rate = rate
         self.multiple_values = multiple_values
+        self.rng = np.random.default_rng() if rng is None else rng
 
-    @beartype
-    def __call__(self, population: NDArray) -> NDArray:
+    @hot
+    def __call__(self, population: NDArray, out: Optional[NDArray] = None) -> NDArray:
         """Insertion mutation algorithm on population
+        All mutated individuals are rolled at once, with one gather
+        The population is mutated in place, unless an output buffer is given
 
         ---
         Parameters:
         population: NDArray
             Array representing the population
+        out: Optional[NDArray]
+            Array of the same shape to write the offspring to, instead of the population
 
         ---
         Returns:
         NDArray representing the offspring
         """
-        for individual in population:
-            if random.random() > self.rate:
-                continue
-            start, end = self._get_movement_boundries(dimensions=population.shape[1])
-            shifts = self._get_number_of_shifts(start, end)
-            individual[start:end] = np.roll(individual[start:end], shifts)
+        population = _get_output(population, out)
+        rows = np.flatnonzero(self.rng.random(len(population)) <= self.rate)
+        dimensions = population.shape[1]
+        start, end = self._get_movement_boundries(dimensions, amount=len(rows))
+        shifts = self._get_number_of_shifts(start, end)
+
+        # Rolling a segment by shift moves the gene at i to i + shift, wrapping around.
+        # Only the genes in the segments are gathered, all at once.
+        lengths = end - start
+        segments = np.repeat(np.arange(len(rows)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        sources = (offsets - shifts[segments]) % lengths[segments]
+        rows, start = rows[segments], start[segments]
+        population[rows, start + offsets] = population[rows, start + sources]
 
         return population
 
-    @beartype
-    @staticmethod
-    def _get_movement_boundries(dimensions: int) -> List[np.int64]:
+    @hot
+    def _get_movement_boundries(
+        self, dimensions: int, amount: int
+    ) -> Tuple[NDArray, NDArray]:
         """Gets the movement boundries: The two values from and to which things are moved
 
         ---
         Parameters:
         dimensions: int
             The amount of dimensions of the population & The range between the two numbers
+        amount: int
+            The amount of individuals to get the boundries of
 
         ---
         Returns:
-        Array containing the two values
+        Two arrays containing the lower and higher value of each individual
         """
-        return sorted(np.random.choice(dimensions, size=2, replace=False))
+        first, second = _get_distinct_pairs(dimensions, amount, self.rng)
+        return np.minimum(first, second), np.maximum(first, second)
 
-    @beartype
-    def _get_number_of_shifts(self, start: np.int64, end: np.int64) -> int:
+    @hot
+    def _get_number_of_shifts(self, start: NDArray, end: NDArray) -> NDArray:
         """Gets the amount of shifts to perform in between the two numbers
 
         ---
         Parameters:
-        start: int
-            The place the movement will start
-        end: int
-            The place the movement will end
+        start: NDArray
+            The places the movements will start
+        end: NDArray
+            The places the movements will end
 
         ---
         Returns
-        int representing the amount of moves to do
+        NDArray representing the amount of moves to do
         """
         if self.multiple_values:
-            return random.randrange(end - start)
+            return (self.rng.random(len(start)) * (end - start)).astype(np.int64)
         else:
-            return 1
+            return np.ones(len(start), dtype=np.int64)
 
 
 class SwapMutation(MutationAlgorithm):
     @beartype
-    def __init__(self, rate: float = 1.0) -> None:
+    def __init__(
+        self, rate: float = 1.0, rng: Optional[np.random.Generator] = None
+    ) -> None:
         """A swap mutation algorithm
 
         ---
         Parameters:
         rate: float [0:1]
             The rate at which to randomly mutate any individual
+        rng: Optional[np.random.Generator]
+            The generator to draw from, a new unseeded one if None
         """
         self.rate = rate
+        self.rng = np.random.default_rng() if rng is None else rng
 
-    @beartype
-    def __call__(self, population: NDArray) -> NDArray:
+    @hot
+    def __call__(self, population: NDArray, out: Optional[NDArray] = None) -> NDArray:
         """Swap mutation algorithm on population
+        All mutated individuals are swapped at once
+        The population is mutated in place, unless an output buffer is given
 
         ---
         Parameters:
         population: NDArray
             Array representing the population
+        out: Optional[NDArray]
+            Array of the same shape to write the offspring to, instead of the population
 
         ---
         Returns:
         NDArray representing the offspring
         """
-        for individual in population:
-            if random.random() > self.rate:
-                continue
-            first, second = self._get_swap_locations(dimensions=population.shape[1])
-            individual[[first, second]] = individual[[second, first]]
+        population = _get_output(population, out)
+        rows = np.flatnonzero(self.rng.random(len(population)) <= self.rate)
+        first, second = self._get_swap_locations(population.shape[1], amount=len(rows))
+        population[rows, first], population[rows, second] = (
+            population[rows, second],
+            population[rows, first],
+        )
 
         return population
 
-    @beartype
-    @staticmethod
-    def _get_swap_locations(dimensions: int) -> NDArray:
+    @hot
+    def _get_swap_locations(
+        self, dimensions: int, amount: int
+    ) -> Tuple[NDArray, NDArray]:
         """Gets the swap locations: The two locations that are swapped with eachother
 
         ---
         Parameters:
         dimensions: int
             The amount of dimensions of the population & The range between the two numbers
+        amount: int
+            The amount of individuals to get the locations of
 
         ---
         Returns:
-        Array containing the two values
+        Two arrays containing the locations of each individual
         """
-        return np.random.choice(dimensions, size=2, replace=False)
+        return _get_distinct_pairs(dimensions, amount, self.rng)
 
 
 class CombinedMutation(MutationAlgorithm):
     @beartype
-    def __init__(self, *args: MutationAlgorithm) -> None:
+    def __init__(
+        self, *args: MutationAlgorithm, rng: Optional[np.random.Generator] = None
+    ) -> None:
         """A wrapper that allows for combination of mutation algorithms
 
         ---
         Parameters:
         args:
             The mutation algorithms to combine
+        rng: Optional[np.random.Generator]
+            If set, the generator all the mutation algorithms draw from
         """
-        # The Haskell is less abstruse:
-        # \x -> foldr args x
-        self.mutation_algorithm = lambda x: reduce(lambda result, f: f(result), args, x)
+        self.mutation_algorithms = args
+        if rng is not None:
+            self.set_rng(rng)
 
     @beartype
-    def __call__(self, population: NDArray) -> NDArray:
-        """Uniform mutation algorithm on population
+    def set_rng(self, rng: np.random.Generator) -> None:
+        """Let all the mutation algorithms draw from the given generator"""
+        for mutation_algorithm in self.mutation_algorithms:
+            mutation_algorithm.set_rng(rng)
+
+    @hot
+    def __call__(self, population: NDArray, out: Optional[NDArray] = None) -> NDArray:
+        """Apply every mutation algorithm in order on population
+        The first one writes to out if it is given, the others mutate its result in place
 
         ---
         Parameters:
         population: NDArray
             Array representing the population
+        out: Optional[NDArray]
+            Array of the same shape to write the offspring to, instead of the population
 
         ---
         Returns:
         NDArray representing the offspring
         """
-        return self.mutation_algorithm(population)
+        for mutation_algorithm in self.mutation_algorithms:
+            population = mutation_algorithm(population, out=out)
+            out = None
+        return _get_output(population, out)
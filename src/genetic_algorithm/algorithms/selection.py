@@ -1,10 +1,20 @@
 from __future__ import annotations
 
-import random
 import numpy as np
 from nptyping import NDArray
 from beartype import beartype
-from beartype.typing import Protocol
+from beartype.typing import Optional, Protocol
+
+from cellular_automata.helpers import hot
+from genetic_algorithm.helpers import get_random_groups
+
+
+@hot
+def _take(children: NDArray, winners: NDArray, out: Optional[NDArray]) -> NDArray:
+    """Gets the winning children, written to the first rows of out if it is given"""
+    if out is None:
+        return children[winners]
+    return np.take(children, winners, axis=0, out=out[: len(winners)])
 
 
 class SelectionAlgorithm(Protocol):
@@ -14,14 +24,30 @@ class SelectionAlgorithm(Protocol):
     def __init__(self, *args, **kwargs) -> None:
         raise NotImplementedError
 
-    @beartype
-    def __call__(self, children: NDArray, scores: NDArray, result_size: int) -> NDArray:
+    @hot
+    def __call__(
+        self,
+        children: NDArray,
+        scores: NDArray,
+        result_size: int,
+        out: Optional[NDArray] = None,
+    ) -> NDArray:
         raise NotImplementedError
 
+    @beartype
+    def set_rng(self, rng: np.random.Generator) -> None:
+        """Draw from the given generator from now on"""
+        self.rng = rng
+
 
 class TournamentSelection(SelectionAlgorithm):
     @beartype
-    def __init__(self, remove_chosen: bool = False, amount_to_take: int = 2) -> None:
+    def __init__(
+        self,
+        remove_chosen: bool = False,
+        amount_to_take: int = 2,
+        rng: Optional[np.random.Generator] = None,
+    ) -> None:
         """A tournament selection algorithm
 
         ---
@@ -30,12 +56,21 @@ class TournamentSelection(SelectionAlgorithm):
             Whether or not to remove previously chosen individuals from the tournament pool
         amount_to_take: int
             The amount of children to take at once for each tournament round
+        rng: Optional[np.random.Generator]
+            The generator to draw from, a new unseeded one if None
         """
         self.remove_chosen = remove_chosen
         self.amount_to_take = amount_to_take
+        self.rng = np.random.default_rng() if rng is None else rng
 
-    @beartype
-    def __call__(self, children: NDArray, scores: NDArray, result_size: int) -> NDArray:
+    @hot
+    def __call__(
+        self,
+        children: NDArray,
+        scores: NDArray,
+        result_size: int,
+        out: Optional[NDArray] = None,
+    ) -> NDArray:
         """Tournament selection algorithm
 
         ---
@@ -47,57 +82,99 @@ class TournamentSelection(SelectionAlgorithm):
             Each index should represent the same index in the population
         result_size: int
             The population size of the result
+        out: Optional[NDArray]
+            Array to write the new population to, with at least result_size rows
 
         ---
         Returns:
-        NDArray representing the new population
+        NDArray representing the new population, a view of out if it is given
         """
-        output = []
-        while len(output) < result_size:
-            winner_index = self.tournament_round(scores)
-            output.append(children[winner_index])
-            if self.remove_chosen:
-                children = np.delete(children, winner_index, axis=0)
-                scores = np.delete(scores, winner_index, axis=0)
-        return np.asarray(output)
+        if not self.remove_chosen:
+            return _take(
+                children, self.tournament_round(scores, amount=result_size), out
+            )
 
-    @beartype
-    def tournament_round(self, scores: NDArray) -> np.int64:
-        """Get the results of one round of the tournament
+        if len(scores) - result_size + 1 < self.amount_to_take:
+            raise ValueError("Too few children to hold every tournament")
+
+        # Tournaments are drawn in batches from the remaining children. A tournament with
+        # a child that an earlier one in the batch took is drawn again in the next batch,
+        # along with the ones after it, so every tournament is drawn from the remaining
+        # children only, like when holding them one by one
+        remaining = np.arange(len(scores))
+        winners = []
+        needed = result_size
+        batch_size = int(np.sqrt(len(scores) / self.amount_to_take)) + 1
+        while needed:
+            amount = min(needed, batch_size)
+            entrants = get_random_groups(
+                len(remaining),
+                amount_of_groups=amount,
+                amount=self.amount_to_take,
+                rng=self.rng,
+            )
+            won = entrants[
+                np.arange(amount), scores[remaining[entrants]].argmax(axis=1)
+            ]
+            first_won = np.full(len(remaining), amount)
+            np.minimum.at(first_won, won, np.arange(amount))
+            taken = (first_won[entrants] < np.arange(amount)[:, np.newaxis]).any(axis=1)
+            accepted = int(np.argmax(taken)) if taken.any() else amount
+
+            winners.append(remaining[won[:accepted]])
+            remaining = np.delete(remaining, won[:accepted])
+            needed -= accepted
+        return _take(children, np.concatenate(winners), out)
+
+    @hot
+    def tournament_round(self, scores: NDArray, amount: int = 1) -> NDArray:
+        """Get the results of independent tournaments, all held at once
 
         ---
         Parameters:
         scores: NDArray
             The Numpy array of scores to chose from
+        amount: int
+            The amount of tournaments to hold
 
         ---
         Returns:
-        np.int46, the index of the winning individual
+        NDArray, the index of the winning individual of every tournament
         """
-        selection = scores[
-            (
-                indexes := np.random.choice(
-                    len(scores), size=self.amount_to_take, replace=False
-                )
-            )
-        ]
-        return indexes[selection.argmax()]
+        entrants = get_random_groups(
+            len(scores),
+            amount_of_groups=amount,
+            amount=self.amount_to_take,
+            rng=self.rng,
+        )
+        return entrants[np.arange(amount), scores[entrants].argmax(axis=1)]
 
 
 class RouletteSelection(SelectionAlgorithm):
     @beartype
-    def __init__(self, remove_chosen: bool = False) -> None:
+    def __init__(
+        self, remove_chosen: bool = False, rng: Optional[np.random.Generator] = None
+    ) -> None:
         """A roulette selection algorithm
 
         ---
         Parameters:
-        rate: float [0:1]
-            The rate at which to randomly mutate
+        remove_chosen: bool
+            Whether or not to remove previously chosen individuals from the wheel
+        rng: Optional[np.random.Generator]
+            The generator to draw from, a new unseeded one if None
         """
         self.remove_chosen = remove_chosen
+        self.rng = np.random.default_rng() if rng is None else rng
 
-    @beartype
-    def __call__(self, children: NDArray, scores: NDArray, result_size: int) -> NDArray:
+    @hot
+    def __call__(
+        self,
+        children: NDArray,
+        scores: NDArray,
+        result_size: int,
+        out: Optional[NDArray] = None,
+    ) -> NDArray:
         """Roulette selection algorithm
 
         ---
@@ -109,23 +186,37 @@ class RouletteSelection(SelectionAlgorithm):
             Each index should represent the same index in the population
         result_size: int
             The population size of the result
+        out: Optional[NDArray]
+            Array to write the new population to, with at least result_size rows
 
         ---
         Returns:
-        NDArray representing the new population
+        NDArray representing the new population, a view of out if it is given
         """
-        output = []
-        while len(output) < result_size:
-            winner_index = self.roulette_wheel(scores)
-            output.append(children[winner_index])
-            if self.remove_chosen:
-                children = np.delete(children, winner_index, axis=0)
-                scores = np.delete(scores, winner_index, axis=0)
-        return np.asarray(output)
+        weights = self.get_weights(scores)
+        if not self.remove_chosen:
+            return _take(
+                children,
+                self.roulette_wheel(weights, self.rng, amount=result_size),
+                out,
+            )
 
-    @beartype
-    def roulette_wheel(self, scores: NDArray) -> np.int64:
-        """Gets the result of a single roulette spin
+        if result_size > len(scores):
+            raise ValueError("Cannot select more children than there are")
+
+        # Spinning the wheel and removing the winner every time is the same as taking the
+        # individuals with the lowest exponential keys, scaled by their weights.
+        # Individuals without weight are taken last, in random order.
+        shuffled = self.rng.permutation(len(scores))
+        with np.errstate(divide="ignore"):
+            keys = self.rng.exponential(size=len(scores)) / weights[shuffled]
+        winners = shuffled[np.argsort(keys, kind="stable")[:result_size]]
+        return _take(children, winners, out)
+
+    @hot
+    @staticmethod
+    def get_weights(scores: NDArray) -> NDArray:
+        """Gets the relative chance of every individual to win a spin
 
         ---
         Parameters:
@@ -134,16 +225,40 @@ class RouletteSelection(SelectionAlgorithm):
 
         ---
         Returns:
-        np.int46, the index of the winning individual
+        NDArray, the weights, which sum up to 1
+        """
+        # Negative scores get no chance, if no individual has a chance, all are equal
+        weights = np.clip(scores.astype(np.float64), 0, None)
+        total = weights.sum()
+        if not np.isfinite(total) or total <= 0:
+            return np.full(len(scores), 1 / len(scores))
+        return weights / total
+
+    @hot
+    @staticmethod
+    def roulette_wheel(
+        weights: NDArray, rng: np.random.Generator, amount: int = 1
+    ) -> NDArray:
+        """Gets the results of independent roulette spins, all at once
+
+        ---
+        Parameters:
+        weights: NDArray
+            The weights of the individuals, as given by get_weights
+        rng: np.random.Generator
+            The generator to spin with
+        amount: int
+            The amount of spins
+
+        ---
+        Returns:
+        NDArray, the index of the winning individual of every spin
         """
-        # Normalisation is to make sure the sum isn't negtive, which ranom.choices doesn't accpet.
-        # With LeadingOnes, there is still the 1/m chance of a 0 at first check, tough, which is sloppily dealt with.
-        weights = scores / (np.sum(scores) + 1)
-        try:
-            [value] = random.choices(scores, weights)
-        except ValueError:
-            value = 0
-        return np.where(scores == value)[0][0]
+        cumulative = np.cumsum(weights)
+        spins = rng.random(amount) * cumulative[-1]
+        winners = np.searchsorted(cumulative, spins, side="right")
+        # Rounding can let a spin land just past the end
+        return np.minimum(winners, len(weights) - 1)
 
 
 class DeterministicSelection(SelectionAlgorithm):
@@ -151,8 +266,14 @@ class DeterministicSelection(SelectionAlgorithm):
     def __init__(self) -> None:
         """A deterministic selection algorithm. The best ones always win."""
 
-    @beartype
-    def __call__(self, children: NDArray, scores: NDArray, result_size: int) -> NDArray:
+    @hot
+    def __call__(
+        self,
+        children: NDArray,
+        scores: NDArray,
+        result_size: int,
+        out: Optional[NDArray] = None,
+    ) -> NDArray:
         """Roulette selection algorithm
 
         ---
@@ -164,15 +285,24 @@ class DeterministicSelection(SelectionAlgorithm):
             Each index should represent the same index in the population
         result_size: int
             The population size of the result
+        out: Optional[NDArray]
+            Array to write the new population to, with at least result_size rows
 
         ---
         Returns:
-        NDArray representing the new population
+        NDArray representing the new population, a view of out if it is given
         """
-        output = []
-        while len(output) < result_size:
-            winner_index = scores.argmax()
-            output.append(children[winner_index])
-            children = np.delete(children, winner_index, axis=0)
-            scores = np.delete(scores, winner_index, axis=0)
-        return np.asarray(output)
+        if result_size > len(scores):
+            raise ValueError("Cannot select more children than there are")
+        if result_size == 0:
+            return _take(children, np.empty(0, dtype=np.int64), out)
+
+        # Take every child that is better than the worst winner, and the first ones of the
+        # children that tie with it, ordered from best to worst, first index first
+        threshold = np.partition(scores, len(scores) - result_size)[
+            len(scores) - result_size
+        ]
+        better = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[: result_size - len(better)]
+        winners = np.concatenate([better, tied])
+        return _take(children, winners[np.lexsort((winners, -scores[winners]))], out)
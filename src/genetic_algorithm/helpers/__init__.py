@@ -1,3 +1,25 @@
-from .population import generate_rand_population, take_random_individual
+from .population import (
+    generate_rand_population,
+    get_random_groups,
+    take_random_individual,
+)
+from .evaluator import ParallelEvaluator
+from .instrumentation import (
+    GenerationRecord,
+    GenerationCallback,
+    JsonLinesSink,
+    Instrumentation,
+    get_diversity,
+)
 
-__all__ = ("generate_rand_population", "take_random_individual")
+__all__ = (
+    "generate_rand_population",
+    "get_random_groups",
+    "take_random_individual",
+    "ParallelEvaluator",
+    "GenerationRecord",
+    "GenerationCallback",
+    "JsonLinesSink",
+    "Instrumentation",
+    "get_diversity",
+)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+from multiprocessing import Pool, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from nptyping import NDArray
+from beartype import beartype
+from beartype.typing import Any, Dict, List, Optional, Tuple
+
+from cellular_automata.helpers import hot
+from cellular_automata import AutomataObjectiveFunction
+
+# The state of a worker process: its batch function, and the shared memory it is attached to
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(objective_function: AutomataObjectiveFunction) -> None:
+    _worker["batch_function"] = objective_function.get_batch_function()
+    _worker["memory"] = {}
+
+
+def _attach(role: str, name: str) -> SharedMemory:
+    """Attach to the block of shared memory for a role, once per block"""
+    memory = _worker["memory"]
+    if role not in memory or memory[role].name != name:
+        # Detach from the block of earlier, smaller populations
+        if role in memory:
+            memory[role].close()
+        # The worker registers the block with the resource tracker of the evaluator,
+        # which it shares, so it is not unregistered here: that would undo the
+        # registration of the evaluator, which unregisters it when unlinking it
+        memory[role] = SharedMemory(name=name)
+    return memory[role]
+
+
+def _evaluate_chunk(
+    population_name: str,
+    scores_name: str,
+    shape: Tuple[int, int],
+    start: int,
+    stop: int,
+) -> None:
+    population_memory = _attach("population", population_name)
+    scores_memory = _attach("scores", scores_name)
+    population = np.ndarray(shape, dtype=np.int8, buffer=population_memory.buf)
+    scores = np.ndarray(shape[0], dtype=np.float64, buffer=scores_memory.buf)
+    scores[start:stop] = _worker["batch_function"](population[start:stop])
+
+
+class ParallelEvaluator:
+    @beartype
+    def __init__(
+        self,
+        objective_function: AutomataObjectiveFunction,
+        processes: Optional[int] = None,
+        chunks_per_process: int = 1,
+    ) -> None:
+        """Scores populations on a persistent pool of worker processes
+        The population and the scores are passed through shared memory, so only the
+        bounds of each chunk are sent to the workers. Close the evaluator when done,
+        or use it as a context manager.
+
+        ---
+        Parameters:
+        objective_function: AutomataObjectiveFunction
+            The objective function to score the individuals with.
+            It is sent to every worker once, when the pool is started
+        processes: Optional[int]
+            The amount of worker processes, the amount of cores if None
+        chunks_per_process: int
+            The amount of chunks to split a population in per worker.
+            More chunks balance the load better when the evaluation times vary.
+        """
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.chunks_per_process = chunks_per_process
+        if os.name == "posix":
+            # Start the resource tracker before the workers, so they share it
+            resource_tracker.ensure_running()
+        self.pool = Pool(
+            self.processes, initializer=_init_worker, initargs=(objective_function,)
+        )
+        self.population_memory: Optional[SharedMemory] = None
+        self.scores_memory: Optional[SharedMemory] = None
+
+    @hot
+    def __call__(self, population: NDArray) -> NDArray:
+        """Score a (pop_size, width) population
+        ---
+        Returns:
+        NDArray of the scores of each individual, alligned by index
+        """
+        self._reserve(population.size, len(population) * 8)
+        shape = population.shape
+        shared_population = np.ndarray(
+            shape, dtype=np.int8, buffer=self.population_memory.buf
+        )
+        shared_population[:] = population
+        scores = np.ndarray(shape[0], dtype=np.float64, buffer=self.scores_memory.buf)
+
+        tasks = [
+            (self.population_memory.name, self.scores_memory.name, shape, start, stop)
+            for start, stop in self.get_chunks(shape[0])
+        ]
+        self.pool.starmap(_evaluate_chunk, tasks)
+        return scores.copy()
+
+    @hot
+    def get_chunks(self, size: int) -> List[Tuple[int, int]]:
+        """Split the range of a population into contiguous chunks of near equal size"""
+        bounds = np.linspace(0, size, self.processes * self.chunks_per_process + 1)
+        bounds = np.unique(bounds.astype(int))
+        return [(int(start), int(stop)) for start, stop in zip(bounds, bounds[1:])]
+
+    @hot
+    def _reserve(self, population_size: int, scores_size: int) -> None:
+        """Make sure the shared memory is large enough, growing it if needed"""
+        if (
+            self.population_memory is None
+            or self.population_memory.size < population_size
+        ):
+            self._release(self.population_memory)
+            self.population_memory = SharedMemory(create=True, size=population_size)
+        if self.scores_memory is None or self.scores_memory.size < scores_size:
+            self._release(self.scores_memory)
+            self.scores_memory = SharedMemory(create=True, size=scores_size)
+
+    @hot
+    @staticmethod
+    def _release(memory: Optional[SharedMemory]) -> None:
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+
+    @beartype
+    def close(self) -> None:
+        """Stop the workers, and free the shared memory"""
+        self.pool.close()
+        self.pool.join()
+        self._release(self.population_memory)
+        self._release(self.scores_memory)
+        self.population_memory = self.scores_memory = None
+
+    def __enter__(self) -> ParallelEvaluator:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import time
+
+import numpy as np
+from nptyping import NDArray
+from beartype import beartype
+from beartype.typing import (
+    Any,
+    Dict,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+)
+
+from cellular_automata.helpers import hot
+from cellular_automata import AutomataObjectiveFunction, CompositeSimilarity
+
+import ioh
+
+PHASES = ("crossover", "mutation", "evaluation", "selection")
+
+
+class GenerationRecord(NamedTuple):
+    """What happened in one generation of a GA run
+
+    The phases hold the wall time in seconds of crossover, mutation, evaluation and
+    selection, which includes keeping the current best. The last generation of a run
+    is not selected from, so its selection time is 0.
+    The scores are those of the evaluated children. The cache hit rate is that of this
+    generation, and None without an objective function or without a cache.
+    With a CompositeSimilarity, similarity_metrics holds the min, mean and max of every
+    one of its methods over the evaluations of this generation, by class name.
+    Otherwise, or when the scores are computed in other processes, it is None.
+    """
+
+    generation: int
+    evaluations: int
+    seconds: float
+    phases: Dict[str, float]
+    evaluations_per_second: float
+    best_so_far: float
+    min_score: float
+    mean_score: float
+    max_score: float
+    diversity: float
+    cache_hit_rate: Optional[float]
+    similarity_metrics: Optional[Dict[str, Dict[str, float]]]
+
+
+class GenerationCallback(Protocol):
+    """The bare type of a callback that is called after every generation"""
+
+    @beartype
+    def __call__(self, record: GenerationRecord) -> None:
+        raise NotImplementedError
+
+
+class JsonLinesSink(GenerationCallback):
+    @beartype
+    def __init__(self, path: str, mode: str = "w") -> None:
+        """Streams every record to a file, as one line of JSON per generation
+        Every line is flushed, so the file can be followed during the run.
+        It holds an open file, so it cannot be sent to other processes.
+
+        ---
+        Parameters:
+        path: str
+            The file to write to
+        mode: str
+            "w" to overwrite the file, "a" to append to it
+        """
+        self.path = path
+        self.file = open(path, mode)
+
+    @beartype
+    def __call__(self, record: GenerationRecord) -> None:
+        self.file.write(json.dumps(record._asdict()) + "\n")
+        self.file.flush()
+
+    @beartype
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> JsonLinesSink:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+@hot
+def get_diversity(population: NDArray) -> float:
+    """Gets the diversity of a population: the chance that two random individuals
+    differ at a gene, averaged over the genes. 0 if all are the same.
+
+    ---
+    Parameters:
+    population: NDArray
+        The (pop_size, dimensions) population to get the diversity of
+
+    ---
+    Returns:
+    float, the mean Gini-Simpson index of the genes
+    """
+    if len(population) == 0:
+        return 0.0
+    same = np.zeros(population.shape[1])
+    for value in np.unique(population):
+        same += np.mean(population == value, axis=0) ** 2
+    return float(1 - same.mean())
+
+
+class Instrumentation:
+    @beartype
+    def __init__(
+        self,
+        callbacks: Sequence[GenerationCallback],
+        objective_function: Optional[AutomataObjectiveFunction] = None,
+    ) -> None:
+        """Times the phases of every generation of one run, and hands a record of
+        each generation to the callbacks. Without callbacks, only the clock is read.
+
+        ---
+        Parameters:
+        callbacks: Sequence[GenerationCallback]
+            The callbacks to call with the record of every generation
+        objective_function: Optional[AutomataObjectiveFunction]
+            The objective function to get the cache hit rates and the metrics of a
+            CompositeSimilarity from. Its similarity collects them until finish is called.
+        """
+        self.callbacks = callbacks
+        self.objective_function = objective_function
+        self.generation = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.start = self.last = time.perf_counter()
+        self.lookups = {"cache": self._get_lookups("cache")}
+        # issubclass, as isinstance checks against protocols are structural
+        similarity = getattr(objective_function, "similarity", None)
+        self.composite = None
+        if callbacks and issubclass(type(similarity), CompositeSimilarity):
+            self.composite = similarity
+            self.composite.collect_metrics()
+
+    @hot
+    def start_generation(self) -> None:
+        """Start the clock of a new generation"""
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.start = self.last = time.perf_counter()
+
+    @hot
+    def lap(self, phase: str) -> None:
+        """Count the time since the last lap towards the given phase"""
+        now = time.perf_counter()
+        self.phases[phase] += now - self.last
+        self.last = now
+
+    @hot
+    def end_generation(
+        self, children: NDArray, scores: NDArray, problem: ioh.problem.Integer
+    ) -> None:
+        """Hand the record of the generation to the callbacks
+
+        ---
+        Parameters:
+        children: NDArray
+            The children that were evaluated in this generation
+        scores: NDArray
+            Their scores, alligned by index
+        problem: ioh.problem.Integer
+            The problem the children were evaluated on
+        """
+        self.generation += 1
+        if not self.callbacks:
+            return
+
+        seconds = time.perf_counter() - self.start
+        record = GenerationRecord(
+            generation=self.generation,
+            evaluations=int(problem.state.evaluations),
+            seconds=seconds,
+            phases=self.phases,
+            evaluations_per_second=len(children) / seconds if seconds > 0 else 0.0,
+            best_so_far=float(problem.state.current_best.y),
+            min_score=float(scores.min()) if len(scores) else float("nan"),
+            mean_score=float(scores.mean()) if len(scores) else float("nan"),
+            max_score=float(scores.max()) if len(scores) else float("nan"),
+            diversity=get_diversity(children),
+            cache_hit_rate=self._get_hit_rate("cache"),
+            similarity_metrics=self._get_similarity_metrics(),
+        )
+        for callback in self.callbacks:
+            callback(record)
+
+    @beartype
+    def finish(self) -> None:
+        """Stop the similarity from collecting metrics, at the end of the run"""
+        if self.composite is not None:
+            self.composite.collect_metrics(False)
+
+    @beartype
+    def _get_similarity_metrics(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Gets the summary of every method of the composite similarity since the
+        last generation"""
+        if self.composite is None:
+            return None
+        metrics = self.composite.take_metrics()
+        if not any(len(scores) for scores in metrics.values()):
+            return None
+        return {
+            name: {
+                "min": float(scores.min()),
+                "mean": float(scores.mean()),
+                "max": float(scores.max()),
+            }
+            for name, scores in metrics.items()
+        }
+
+    @beartype
+    def _get_lookups(self, name: str) -> Optional[Tuple[int, int]]:
+        """Gets the hits and misses of a cache of the objective function so far"""
+        cache = getattr(self.objective_function, name, None)
+        if cache is None:
+            return None
+        return cache.hits, cache.misses
+
+    @beartype
+    def _get_hit_rate(self, name: str) -> Optional[float]:
+        """Gets the hit rate of a cache since the last time it was asked for"""
+        lookups = self._get_lookups(name)
+        if lookups is None or self.lookups[name] is None:
+            return None
+        hits, misses = (now - last for now, last in zip(lookups, self.lookups[name]))
+        self.lookups[name] = lookups
+        return hits / (hits + misses) if hits + misses else None
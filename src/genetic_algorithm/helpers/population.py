@@ -3,11 +3,19 @@ from __future__ import annotations
 import numpy as np
 from nptyping import NDArray
 from beartype import beartype
+from beartype.typing import Optional
+
+from cellular_automata.helpers import hot
 
 
 @beartype
 def generate_rand_population(
-    *, pop_size: int, dimensions: int, lb: int = 0, ub: int = 1
+    *,
+    pop_size: int,
+    dimensions: int,
+    lb: int = 0,
+    ub: int = 1,
+    rng: Optional[np.random.Generator] = None,
 ) -> NDArray:
     """Generates a random population
 
@@ -17,19 +25,22 @@ def generate_rand_population(
         Population size of the population
     dimensions: int
         amount of dimensions for each individual in the population
+    rng: Optional[np.random.Generator]
+        The generator to draw from, a new unseeded one if None
 
     ---
     Returns:
     NDArray[NDarray[np.int8]]
         A two-dimensional array with 8-bit ints of random values 1 or 0
     """
-    return np.random.randint(
-        low=lb, high=ub + 1, size=(pop_size, dimensions), dtype=np.int8
-    )
+    rng = np.random.default_rng() if rng is None else rng
+    return rng.integers(lb, ub + 1, size=(pop_size, dimensions), dtype=np.int8)
 
 
 @beartype
-def take_random_individual(population: NDArray, *, amount: int = 1) -> NDArray:
+def take_random_individual(
+    population: NDArray, *, amount: int = 1, rng: Optional[np.random.Generator] = None
+) -> NDArray:
     """Takes random distinct individuals from a population
 
     ---
@@ -38,10 +49,65 @@ def take_random_individual(population: NDArray, *, amount: int = 1) -> NDArray:
         A two-dimensional array representing the population to pull from
     amount: int
         The amount of non-repeating individuals to take
+    rng: Optional[np.random.Generator]
+        The generator to draw from, a new unseeded one if None
 
     ---
     Returns:
     NDArray[NDArray[np.int8]]
         A two-dimensional array representing the picked individuals.
     """
-    return population[np.random.choice(len(population), size=amount, replace=False)]
+    rng = np.random.default_rng() if rng is None else rng
+    return population[rng.choice(len(population), size=amount, replace=False)]
+
+
+@hot
+def get_random_groups(
+    size: int,
+    *,
+    amount_of_groups: int,
+    amount: int,
+    rng: Optional[np.random.Generator] = None,
+) -> NDArray:
+    """Gets the indices of random distinct individuals for many groups at once
+    Every row is distributed like rng.choice(size, size=amount, replace=False)
+
+    ---
+    Parameters:
+    size: int
+        The size of the population to pull from
+    amount_of_groups: int
+        The amount of groups to pull
+    amount: int
+        The amount of non-repeating individuals to take per group
+    rng: Optional[np.random.Generator]
+        The generator to draw from, a new unseeded one if None
+
+    ---
+    Returns:
+    NDArray[NDArray[np.int64]]
+        A (amount_of_groups, amount) array of the indices of the picked individuals.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    if amount > size:
+        raise ValueError("Cannot take more individuals than the size of the population")
+    if amount == 0:
+        return np.empty((amount_of_groups, 0), dtype=np.int64)
+
+    if amount * amount < size:
+        # Few individuals from many, so Floyd's algorithm only draws amount per group
+        chosen = np.empty((amount_of_groups, amount), dtype=np.int64)
+        for i, j in enumerate(range(size - amount, size)):
+            picked = rng.integers(j + 1, size=amount_of_groups)
+            taken = (chosen[:, :i] == picked[:, np.newaxis]).any(axis=1)
+            chosen[:, i] = np.where(taken, j, picked)
+        # The set is uniformly random, but its order is not
+        order = np.argsort(rng.random((amount_of_groups, amount)), axis=1)
+        return np.take_along_axis(chosen, order, axis=1)
+
+    # The individuals with the lowest random keys, in the order of their keys,
+    # are a uniformly random ordered sample
+    keys = rng.random((amount_of_groups, size))
+    lowest = np.argpartition(keys, amount - 1, axis=1)[:, :amount]
+    order = np.argsort(np.take_along_axis(keys, lowest, axis=1), axis=1)
+    return np.take_along_axis(lowest, order, axis=1)
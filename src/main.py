@@ -1,8 +1,9 @@
 from beartype import beartype
-from beartype.typing import Dict
+from beartype.typing import Dict, Optional
 
 from cellular_automata import AutomataObjectiveFunction
 from genetic_algorithm.algorithms import *
+from genetic_algorithm.helpers import ParallelEvaluator
 from cellular_automata.similarity import *
 from tests import *
 
@@ -12,9 +13,11 @@ INPUTFILE = "./input/ca_input.csv"
 @beartype
 def new_genetic_algorithm(
     objective_function: AutomataObjectiveFunction,
+    evaluator: Optional[ParallelEvaluator] = None,
 ) -> GeneticAlgorithm:
     """Return a new genetic algorithem with the given amount of dimensions.
-    Parameters of the algorithm can be set by writing code in this funcion"""
+    Parameters of the algorithm can be set by writing code in this funcion
+    If an evaluator is given, the generations are scored on its worker processes"""
 
     crossover_algorithm = PointCrossover(
         offspring_rate=1.7, amount_of_parents=4, swap_function=Swap.random, amount_of_splits=4
@@ -39,6 +42,8 @@ def new_genetic_algorithm(
         mutation_algorithm=mutation_algorithm,
         selection_algorithm=selection_algorithm,
         objective_function=objective_function,
+        batch_evaluation=True,
+        evaluator=evaluator,
     )
 
 
@@ -57,6 +62,10 @@ def main():
     genetic_algorithm = new_genetic_algorithm(objective_function)
     problem = wrap_objective_function(objective_function, "Test")
 
+    # Wide stages over many steps can be scored on all cores instead:
+    # with ParallelEvaluator(objective_function) as evaluator:
+    #     genetic_algorithm = new_genetic_algorithm(objective_function, evaluator)
+
     # test_algorithm(
     #     budget=10000,
     #     genetic_algorithm=genetic_algorithm,
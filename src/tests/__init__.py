@@ -3,6 +3,10 @@ from .tests import (
     collect_data_onemax_leadingones,
     collect_data_cellular,
 )
+from .parallel import (
+    collect_data_onemax_leadingones_parallel,
+    collect_data_cellular_parallel,
+)
 from .helpers import (
     new_standard_problem,
     get_input,
@@ -14,6 +18,8 @@ __all__ = (
     "test_algorithm",
     "collect_data_onemax_leadingones",
     "collect_data_cellular",
+    "collect_data_onemax_leadingones_parallel",
+    "collect_data_cellular_parallel",
     "new_standard_problem",
     "get_input",
     "objective_function_from_input",
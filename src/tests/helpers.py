@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import csv
+from pathlib import Path
 
 import numpy as np
 from beartype import beartype
@@ -14,13 +15,17 @@ from cellular_automata import (
 
 import ioh
 
+# Composed rule tables are stored here, so they are only built once across experiment runs.
+# The folder is in the root of the repository, whichever folder the drivers run from.
+RULE_TABLE_CACHE = str(Path(__file__).resolve().parents[2] / "rule_tables")
+
 
 @beartype
 def new_standard_problem(
     test: str = "OneMax",
     dimension: int = 100,
     instance=1,
-) -> IOHProblem:
+) -> ioh.problem.Integer:
     return ioh.get_problem(test, instance, dimension, "Integer")
 
 
@@ -50,6 +55,7 @@ def objective_function_from_input(
         rule=item["rule#"],
         k=item["k"],
         r=1,
+        cache_dir=RULE_TABLE_CACHE,
     )
     return AutomataObjectiveFunction(
         ca=ca,
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+from beartype import beartype
+from beartype.typing import Callable, List, NamedTuple, Optional, Union
+
+from .helpers import new_standard_problem, wrap_objective_function
+from genetic_algorithm.algorithms import GeneticAlgorithm
+from cellular_automata import AutomataObjectiveFunction
+
+import ioh
+
+
+class Job(NamedTuple):
+    """One repetition of a GA on one problem instance, run in its own process
+
+    The problem is either the name of a PBO function, or an objective function to wrap,
+    as ioh problems themselves cannot be sent to another process.
+    """
+
+    genetic_algorithm: GeneticAlgorithm
+    budget: int
+    problem: Union[str, AutomataObjectiveFunction]
+    problem_name: str
+    instance: int
+    dimension: int
+    repetition: int
+    seed: int
+    name: str
+    folder: str
+
+
+@beartype
+def new_seeded_run(
+    genetic_algorithm: GeneticAlgorithm,
+    problem: Union[str, AutomataObjectiveFunction],
+    problem_name: str,
+    seed: int,
+    dimension: int = 100,
+    instance: int = 1,
+) -> Callable:
+    """Seed a GA for one run, and get the ioh problem to run it on
+    The GA and all its algorithms draw from a generator of the seed only,
+    so the run can be repeated from the seed alone.
+
+    ---
+    Parameters:
+    genetic_algorithm: GeneticAlgorithm
+        The algorithm to seed
+    problem: Union[str, AutomataObjectiveFunction]
+        The name of a PBO function, or an objective function to wrap
+    problem_name: str
+        The name of the wrapped objective function
+    seed: int
+        The seed of the run
+    dimension: int
+        The dimension of a PBO function
+    instance: int
+        The instance of a PBO function
+
+    ---
+    Returns:
+    The new ioh problem
+    """
+    genetic_algorithm.set_rng(np.random.default_rng(seed))
+    if isinstance(problem, str):
+        return new_standard_problem(problem, dimension, instance)
+    return wrap_objective_function(problem, problem_name)
+
+
+@beartype
+def run_job(job: Job) -> str:
+    """Run a job with its own seed and ioh logger, returning the folder it logged to"""
+    problem = new_seeded_run(
+        job.genetic_algorithm,
+        job.problem,
+        job.problem_name,
+        job.seed,
+        job.dimension,
+        job.instance,
+    )
+
+    root, folder_name = os.path.split(job.folder)
+    logger = ioh.logger.Analyzer(
+        root=root, folder_name=folder_name, algorithm_name=job.name
+    )
+    problem.attach_logger(logger)
+    job.genetic_algorithm(problem, job.budget)
+    logger.close()
+    return job.folder
+
+
+@beartype
+def get_seeds(amount: int, seed: Optional[int] = None) -> List[int]:
+    """Get independent seeds for the jobs of an experiment, reproducible if seed is set"""
+    sequences = np.random.SeedSequence(seed).spawn(amount)
+    return [int(sequence.generate_state(1)[0]) for sequence in sequences]
+
+
+@beartype
+def run_jobs(jobs: List[Job], processes: Optional[int] = None) -> List[str]:
+    """Run the jobs on a pool of worker processes, returning their folders in order"""
+    with Pool(processes) as pool:
+        return pool.map(run_job, jobs, chunksize=1)
+
+
+@beartype
+def _numbered(path: Path, index: int) -> Path:
+    return path.with_name(f"{path.stem}_{index}{path.suffix}")
+
+
+@beartype
+def merge_ioh_data(folders: List[str], target: str = "ioh_data") -> None:
+    """Merge the Analyzer outputs of several jobs into one Analyzer folder
+
+    Every data file gets the index of its job appended to its name, and the info files
+    of the jobs are concatenated with their references to the data files renamed.
+    Other metadata files are kept per job, with the same renaming.
+    """
+    target_path = Path(target)
+    for index, folder in enumerate(folders):
+        folder_path = Path(folder)
+        files = sorted(path for path in folder_path.rglob("*") if path.is_file())
+        renamed = {}
+        for path in files:
+            if path.suffix == ".dat":
+                relative = path.relative_to(folder_path)
+                renamed[relative.as_posix()] = _numbered(relative, index).as_posix()
+
+        for path in files:
+            relative = path.relative_to(folder_path)
+            if path.suffix == ".dat":
+                destination = target_path / renamed[relative.as_posix()]
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(path, destination)
+                continue
+
+            text = path.read_text()
+            for old, new in renamed.items():
+                text = text.replace(old, new)
+            if path.suffix == ".info":
+                destination = target_path / relative
+            else:
+                destination = target_path / _numbered(relative, index)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with open(destination, "a") as f:
+                f.write(text if text.endswith("\n") else text + "\n")
+
+
+@beartype
+def run_experiment(
+    jobs: List[Job], scratch: str, processes: Optional[int] = None
+) -> None:
+    """Run the jobs in parallel, and archive their merged results to ioh_data.zip"""
+    try:
+        folders = run_jobs(jobs, processes)
+        merge_ioh_data(folders)
+    finally:
+        shutil.rmtree(scratch)
+
+    shutil.make_archive("ioh_data", "zip", "ioh_data")
+    shutil.rmtree("ioh_data")
+
+
+@beartype
+def collect_data_onemax_leadingones_parallel(
+    genetic_algorithm: GeneticAlgorithm,
+    name: str,
+    dimension: int,
+    nreps: int = 5,
+    processes: Optional[int] = None,
+    seed: Optional[int] = None,
+):
+    """OneMax + LeadingOnes functions 10 instances, with the repetitions run in parallel.
+
+    Produces the same ioh_data.zip as collect_data_onemax_leadingones.
+
+    Parameters
+    ----------
+    genetic_algorithm: GeneticAlgorithm
+        The algorithm to test. It is copied to every worker, so it cannot hold
+        a ParallelEvaluator.
+    name: str
+        The name to use for the algorithm
+    dimension: int
+        The dimension of the problem, i.e. the number of search space variables.
+    nreps: int
+        The number of repetitions for each problem instance.
+    processes: Optional[int]
+        The amount of worker processes, the amount of cores if None
+    seed: Optional[int]
+        The seed to derive the seed of every repetition from
+    """
+
+    budget = int(dimension * 5e2)
+    scratch = tempfile.mkdtemp(prefix="ioh_jobs_")
+    keys = [
+        (problem, instance, repetition)
+        for problem in ["OneMax", "LeadingOnes"]
+        for instance in range(1, 11)
+        for repetition in range(nreps)
+    ]
+    jobs = [
+        Job(
+            genetic_algorithm=genetic_algorithm,
+            budget=budget,
+            problem=problem,
+            problem_name=problem,
+            instance=instance,
+            dimension=dimension,
+            repetition=repetition,
+            seed=job_seed,
+            name=name,
+            folder=os.path.join(scratch, f"job{index}"),
+        )
+        for index, ((problem, instance, repetition), job_seed) in enumerate(
+            zip(keys, get_seeds(len(keys), seed))
+        )
+    ]
+    run_experiment(jobs, scratch, processes)
+
+
+@beartype
+def collect_data_cellular_parallel(
+    budget: int,
+    genetic_algorithm: GeneticAlgorithm,
+    objective_function: AutomataObjectiveFunction,
+    nreps: int = 9,
+    name: str = "GeneticAlgorithm",
+    problem_name: str = "ObjectiveFunction",
+    processes: Optional[int] = None,
+    seed: Optional[int] = None,
+):
+    """CellularAutomata evaluation, with the repetitions run in parallel.
+
+    Produces the same ioh_data.zip as collect_data_cellular.
+
+    Parameters
+    ----------
+    budget: int
+        The budget
+    genetic_algorithm: GeneticAlgorithm
+        The algorithm to test. It is copied to every worker, so it cannot hold
+        a ParallelEvaluator.
+    objective_function: AutomataObjectiveFunction
+        The objective function to wrap as the ioh problem in every worker
+    nreps: int
+        The number of repetitions for each problem instance.
+    name: str
+        The name to use for the algorithm
+    problem_name: str
+        The name to use for the problem
+    processes: Optional[int]
+        The amount of worker processes, the amount of cores if None
+    seed: Optional[int]
+        The seed to derive the seed of every repetition from
+    """
+
+    scratch = tempfile.mkdtemp(prefix="ioh_jobs_")
+    jobs = [
+        Job(
+            genetic_algorithm=genetic_algorithm,
+            budget=budget,
+            problem=objective_function,
+            problem_name=problem_name,
+            instance=1,
+            dimension=len(objective_function.ct),
+            repetition=repetition,
+            seed=job_seed,
+            name=name,
+            folder=os.path.join(scratch, f"job{repetition}"),
+        )
+        for repetition, job_seed in enumerate(get_seeds(nreps, seed))
+    ]
+    run_experiment(jobs, scratch, processes)
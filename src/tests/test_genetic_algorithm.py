@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from genetic_algorithm.algorithms import (
+    BitflipMutation,
+    CombinedMutation,
+    GeneticAlgorithm,
+    InsertionMutation,
+    PointCrossover,
+    SwapMutation,
+    TournamentSelection,
+)
+from cellular_automata import CompositeSimilarity, HammingSimilarity, LeeSimilarity
+from genetic_algorithm.helpers import JsonLinesSink
+from main import new_genetic_algorithm, new_objective_function
+from tests.helpers import (
+    get_input,
+    objective_function_from_input,
+    wrap_objective_function,
+)
+
+INPUTFILE = str(Path(__file__).resolve().parents[2] / "input" / "ca_input.csv")
+
+
+@pytest.mark.parametrize("last_generation", [1, 2, 169, 170])
+def test_genetic_algorithm_spends_exactly_its_budget(last_generation):
+    objective_function = new_objective_function(get_input(INPUTFILE)[2])
+    genetic_algorithm = new_genetic_algorithm(objective_function)
+    genetic_algorithm.set_rng(np.random.default_rng(0))
+    problem = wrap_objective_function(objective_function, "Test")
+    # main.py's GA has 170 children per generation
+    budget = 2 * 170 + last_generation
+
+    genetic_algorithm(problem, budget)
+
+    assert problem.state.evaluations == budget
+
+
+class RecordingCrossover(PointCrossover):
+    def __call__(self, population, out=None):
+        children = super().__call__(population, out=out)
+        self.children.append(children.copy())
+        return children
+
+
+class RecordingSelection(TournamentSelection):
+    def __call__(self, children, scores, amount, out=None):
+        self.children.append(children.copy())
+        return super().__call__(children, scores, amount, out=out)
+
+
+@pytest.mark.parametrize(
+    "mutation",
+    [
+        # Out of place without a buffer
+        lambda: BitflipMutation(rate=5.0),
+        # In place without a buffer
+        lambda: InsertionMutation(rate=1.0, multiple_values=True),
+        lambda: SwapMutation(rate=1.0),
+        lambda: CombinedMutation(SwapMutation(rate=1.0), BitflipMutation(rate=5.0)),
+    ],
+)
+def test_genetic_algorithm_selects_from_children_before_mutation(mutation):
+    objective_function = new_objective_function(get_input(INPUTFILE)[1])
+    crossover = RecordingCrossover(amount_of_splits=2)
+    selection = RecordingSelection()
+    genetic_algorithm = GeneticAlgorithm(
+        pop_size=20,
+        greedy=False,
+        crossover_algorithm=crossover,
+        mutation_algorithm=mutation(),
+        selection_algorithm=selection,
+        objective_function=objective_function,
+        rng=np.random.default_rng(0),
+    )
+    problem = wrap_objective_function(objective_function)
+
+    crossover.children, selection.children = [], []
+    genetic_algorithm(problem, 100)
+
+    assert len(selection.children) == 4
+    for selected_from, children in zip(selection.children, crossover.children):
+        np.testing.assert_array_equal(selected_from, children)
+
+
+def test_genetic_algorithm_of_main_is_reproducible_from_its_seed():
+    objective_function = new_objective_function(get_input(INPUTFILE)[2])
+    results = []
+    for global_seed in (1, 2):
+        # The GA and its algorithms only draw from the generator they are given
+        np.random.seed(global_seed)
+        genetic_algorithm = new_genetic_algorithm(objective_function)
+        genetic_algorithm.set_rng(np.random.default_rng(0))
+        problem = wrap_objective_function(objective_function, "Test")
+        solution = genetic_algorithm(problem, 1000)
+        results.append((list(solution.x), solution.y))
+
+    assert results[0] == results[1]
+
+
+class FailingCallback:
+    def __init__(self, generation):
+        self.generation = generation
+
+    def __call__(self, record):
+        if record.generation == self.generation:
+            raise RuntimeError("The callback failed")
+
+
+def test_genetic_algorithm_finishes_its_instrumentation_when_it_raises(tmp_path):
+    similarity = CompositeSimilarity(HammingSimilarity(), LeeSimilarity())
+    objective_function = objective_function_from_input(
+        get_input(INPUTFILE)[1], similarity
+    )
+    path = tmp_path / "generations.jsonl"
+    with JsonLinesSink(str(path)) as sink:
+        genetic_algorithm = GeneticAlgorithm(
+            pop_size=20,
+            greedy=False,
+            crossover_algorithm=PointCrossover(),
+            mutation_algorithm=BitflipMutation(rate=1.0),
+            selection_algorithm=TournamentSelection(),
+            objective_function=objective_function,
+            batch_evaluation=True,
+            rng=np.random.default_rng(0),
+            callbacks=[sink, FailingCallback(generation=2)],
+        )
+        problem = wrap_objective_function(objective_function)
+        with pytest.raises(RuntimeError):
+            genetic_algorithm(problem, 1000)
+
+        assert similarity.collected is None
+    assert sink.file.closed
+    assert len(path.read_text().splitlines()) == 2
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pickle
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from genetic_algorithm.helpers import ParallelEvaluator
+from main import new_genetic_algorithm, new_objective_function
+from tests.helpers import get_input, wrap_objective_function
+from tests.parallel import collect_data_cellular_parallel
+
+INPUTFILE = str(Path(__file__).resolve().parents[2] / "input" / "ca_input.csv")
+
+
+@pytest.fixture
+def objective_function():
+    return new_objective_function(get_input(INPUTFILE)[1])
+
+
+def test_genetic_algorithm_of_main_pickles(objective_function):
+    genetic_algorithm = new_genetic_algorithm(objective_function)
+    assert genetic_algorithm.batch_function is not None
+
+    copy = pickle.loads(pickle.dumps(genetic_algorithm))
+    population = objective_function.ct[None]
+    assert copy.batch_function.__self__ is copy.objective_function
+    assert list(copy.batch_function(population)) == list(
+        genetic_algorithm.batch_function(population)
+    )
+
+
+def test_collect_data_cellular_parallel_with_main(
+    objective_function, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    collect_data_cellular_parallel(
+        budget=300,
+        genetic_algorithm=new_genetic_algorithm(objective_function),
+        objective_function=objective_function,
+        nreps=2,
+        processes=2,
+        seed=0,
+    )
+
+    with zipfile.ZipFile(tmp_path / "ioh_data.zip") as archive:
+        names = archive.namelist()
+    # One data file per repetition, merged from the workers
+    assert sum(name.endswith(".dat") for name in names) == 2
+
+
+def test_genetic_algorithm_of_main_with_evaluator(objective_function):
+    population = np.random.default_rng(0).integers(2, size=(170, 60), dtype=np.int8)
+    expected = objective_function.get_batch_function()(population)
+    with ParallelEvaluator(objective_function, processes=2) as evaluator:
+        genetic_algorithm = new_genetic_algorithm(objective_function, evaluator)
+        genetic_algorithm.set_rng(np.random.default_rng(0))
+        np.testing.assert_array_equal(
+            genetic_algorithm.batch_function(population), expected
+        )
+        problem = wrap_objective_function(objective_function)
+        genetic_algorithm(problem, 400)
+    assert problem.state.evaluations == 400
+
+
+CLOSE_EVALUATORS = """
+import numpy as np
+from main import new_objective_function
+from tests.helpers import get_input
+from genetic_algorithm.helpers import ParallelEvaluator
+
+objective_function = new_objective_function(get_input({inputfile!r})[1])
+population = np.zeros((170, 60), dtype=np.int8)
+for _ in range(2):
+    with ParallelEvaluator(objective_function, processes=2) as evaluator:
+        evaluator(population)
+        evaluator(np.vstack([population, population]))
+"""
+
+
+def test_parallel_evaluator_closes_silently():
+    # The resource tracker reports blocks that are unregistered twice on stderr
+    result = subprocess.run(
+        [sys.executable, "-c", CLOSE_EVALUATORS.format(inputfile=INPUTFILE)],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stderr == ""
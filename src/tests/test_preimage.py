@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from cellular_automata import HammingSimilarity, PreimageSolver
+from tests.helpers import get_input, objective_function_from_input
+
+INPUTFILE = str(Path(__file__).resolve().parents[2] / "input" / "ca_input.csv")
+
+
+def new_solver(row, timeout):
+    objective_function = objective_function_from_input(
+        get_input(INPUTFILE)[row], HammingSimilarity()
+    )
+    return PreimageSolver.from_objective_function(objective_function, timeout)
+
+
+@pytest.mark.parametrize("row", [0, 1, 3, 5, 7])
+def test_first_preimage_evolves_to_ct(row):
+    solver = new_solver(row, timeout=10.0)
+    c0 = solver.first()
+
+    assert c0 is not None
+    np.testing.assert_array_equal(solver.ca(c0.copy(), solver.t), solver.ct)
+
+
+@pytest.mark.parametrize("row", [8, 9])
+def test_first_preimage_out_of_reach_times_out(row):
+    solver = new_solver(row, timeout=0.5)
+    start = time.monotonic()
+
+    with pytest.raises(TimeoutError):
+        solver.first()
+    assert time.monotonic() - start < 5